@@ -174,22 +174,28 @@ class BoundedproblemList(object):
     def __init__(self, size_bound):
         self._count = 0
         self._exceptions = []
+        # Significance keys of self._exceptions, in the same order.
+        self._keys = []
         self._size_bound = size_bound
 
     def add(self, e):
         self._count += 1
         try:
-            bisect.insort(self._exceptions, e)
+            key = e.get_significance_key()
         except TypeError:
-            # The base class ExceptionWithContext raises this exception in __cmp__
-            # to signal that an object is not comparable. Instead of keeping the most
-            # significant issue keep the first reported.
+            # The base class ExceptionWithContext raises this exception in
+            # get_significance_key to signal that an object is not comparable.
+            # Instead of keeping the most significant issue keep the first reported.
             if self._count <= self._size_bound:
                 self._exceptions.append(e)
         else:
-            # self._exceptions is in order. Drop the least significant if the list is
-            # now too long.
+            # self._exceptions is in order. Insert after problems with an equal key
+            # and drop the least significant if the list is now too long.
+            index = bisect.bisect_right(self._keys, key)
+            self._keys.insert(index, key)
+            self._exceptions.insert(index, e)
             if self._count > self._size_bound:
+                del self._keys[-1]
                 del self._exceptions[-1]
 
     def _get_dropped_count(self):
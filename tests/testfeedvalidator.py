@@ -363,13 +363,13 @@ class LimitPerTypeProblemReporterTestCase(util.TestCase):
                                        "description", "w1 w2")
 
     def test_keep_unsorted(self):
-        """An imperfect test that insort triggers ExceptionWithContext.__cmp__."""
-        # If ExceptionWithContext.__cmp__ doesn't trigger TypeError in
-        # bisect.insort then the default comparison of object id will be used. The
-        # id values tend to be given out in order of creation so call
+        """An imperfect test that add triggers get_significance_key."""
+        # If ExceptionWithContext.get_significance_key doesn't trigger TypeError
+        # in BoundedproblemList.add then the problems would be ordered by key.
+        # Keys such as object ids tend to be given out in order of creation so call
         # problems._Report with objects in a different order. This test should
-        # break if ExceptionWithContext.__cmp__ is removed or changed to return 0
-        # or cmp(id(self), id(y)).
+        # break if ExceptionWithContext.get_significance_key is changed to return
+        # 0 or id(self).
         exceptions = []
         for i in range(20):
             exceptions.append(transitfeed.other_problem(description="e%i" % i))
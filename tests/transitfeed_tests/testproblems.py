@@ -15,9 +15,12 @@
 # Unit tests for the problem module.
 from __future__ import absolute_import
 
+import io
 import re
+import sys
 from tests import util
 import transitfeed
+from transitfeed import problems
 
 
 class ProblemReporterTestCase(util.RedirectStdOutTestCaseBase):
@@ -62,6 +65,95 @@ class ProblemReporterTestCase(util.RedirectStdOutTestCaseBase):
         self.assertTrue(re.search(r"1111.+2222", self.this_stdout.getvalue()))
 
 
+class SimpleProblemAccumulatorReportManyTestCase(util.TestCase):
+    def _make_problems(self):
+        context = ('stops.txt', 3, ['s1', 'Stop 1'], ['stop_id', 'stop_name'])
+        return [
+            problems.other_problem(description='no context'),
+            problems.invalid_value(column_name='stop_name', value='Stop 1',
+                                   context=context),
+            problems.missing_value(column_name='stop_lat', context=context,
+                                   type=problems.TYPE_WARNING),
+            problems.other_problem(description='word ' * 40),
+        ]
+
+    def _capture(self, report):
+        saved_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            report()
+            return sys.stdout.getvalue()
+        finally:
+            sys.stdout = saved_stdout
+
+    def test_report_many_matches_report(self):
+        accumulator = problems.SimpleProblemAccumulator()
+
+        def report_each():
+            for e in self._make_problems():
+                accumulator._report(e)
+
+        expected = self._capture(report_each)
+        actual = self._capture(
+            lambda: accumulator._report_many(self._make_problems()))
+        self.assertTrue(re.search(r'stops.txt:3', expected))
+        self.assertTrue(re.search(r'no context', expected))
+        self.assertEqual(expected, actual)
+
+    def test_add_all_to_accumulator(self):
+        accumulator = problems.CountingProblemAccumulator()
+        pr = problems.ProblemReporter(accumulator)
+        pr.add_all_to_accumulator(self._make_problems())
+        self.assertEqual(3, accumulator.count(problems.TYPE_ERROR))
+        self.assertEqual(1, accumulator.count(problems.TYPE_WARNING))
+
+
+class CountingProblemAccumulatorTestCase(util.TestCase):
+    def test_counts_without_formatting(self):
+        accumulator = problems.CountingProblemAccumulator()
+        pr = problems.ProblemReporter(accumulator)
+        pr.other_problem('e1')
+        pr.other_problem('w1', type=problems.TYPE_WARNING)
+        pr.other_problem('e2')
+        pr.missing_value('stop_name')
+        self.assertEqual(2, accumulator.counts[('other_problem',
+                                                problems.TYPE_ERROR)])
+        self.assertEqual(3, accumulator.count(problems.TYPE_ERROR))
+        self.assertEqual(1, accumulator.count(problems.TYPE_WARNING))
+        self.assertEqual(0, accumulator.count(problems.TYPE_NOTICE))
+
+
+class DeduplicatingProblemAccumulatorTestCase(util.TestCase):
+    def test_drops_repeated_warnings(self):
+        counter = problems.CountingProblemAccumulator()
+        accumulator = problems.DeduplicatingProblemAccumulator(counter)
+        pr = problems.ProblemReporter(accumulator)
+        for _ in range(3):
+            pr.unused_stop('s1', 'Stop 1')
+            pr.other_problem('e1')
+        pr.unused_stop('s2', 'Stop 2')
+        self.assertEqual(2, counter.count(problems.TYPE_WARNING))
+        self.assertEqual(3, counter.count(problems.TYPE_ERROR))
+        self.assertEqual(2, accumulator.get_suppressed_count())
+
+        accumulator.report_summary()
+        self.assertEqual(1, counter.count(problems.TYPE_NOTICE))
+
+
+class SignificanceOrderTestCase(util.TestCase):
+    def test_sort_too_fast_travel(self):
+        exceptions = [problems.too_fast_travel(trip_id=trip_id, dist=dist)
+                      for trip_id, dist in (('t1', 1120.4), ('t2', 11230.4),
+                                            ('t3', 1230.4))]
+        self.assertEqual(['t2', 't3', 't1'],
+                         [e.trip_id for e in sorted(exceptions)])
+
+    def test_not_comparable(self):
+        exceptions = [problems.other_problem(description='e1'),
+                      problems.other_problem(description='e2')]
+        self.assertRaises(TypeError, sorted, exceptions)
+
+
 class BadProblemReporterTestCase(util.RedirectStdOutTestCaseBase):
     """Make sure ProblemReporter doesn't crash when given bad unicode data and
     does find some error"""
@@ -17,9 +17,12 @@ from __future__ import absolute_import
 
 import datetime
 from datetime import date
+from io import BytesIO
 from tests import util
 import time
 import transitfeed
+from transitfeed import problems
+import zipfile
 
 
 class ServicePeriodValidationTestCase(util.ValidationTestCase):
@@ -175,6 +178,20 @@ class ServicePeriodValidationTestCase(util.ValidationTestCase):
         self.accumulator.AssertNoMoreExceptions()
 
 
+class ServicePeriodValidateDateTestCase(util.TestCase):
+    def test_non_ascii_digits(self):
+        accumulator = problems.CountingProblemAccumulator()
+        pr = problems.ProblemReporter(accumulator)
+        period = transitfeed.ServicePeriod('WEEKDAY')
+        self.assertTrue(period.validate_date('20070101', 'date', pr))
+        # full-width digits
+        self.assertFalse(period.validate_date(
+            u'\uff12\uff10\uff10\uff17\uff10\uff11\uff10\uff11', 'date', pr))
+        self.assertEqual(1, accumulator.counts[('invalid_value',
+                                                problems.TYPE_ERROR)])
+        self.assertEqual(1, accumulator.count(problems.TYPE_ERROR))
+
+
 class ServicePeriodDateRangeTestCase(util.ValidationTestCase):
     def run_test(self):
         period = transitfeed.ServicePeriod()
@@ -469,6 +486,57 @@ class CalendarTxtIntegrationTestCase(util.MemoryZipTestCase):
         self.accumulator.AssertNoMoreExceptions()
 
 
+class ListProblemAccumulator(problems.ProblemAccumulatorInterface):
+    """Keeps every reported problem, without formatting it."""
+
+    def __init__(self):
+        self.exceptions = []
+
+    def _report(self, e):
+        self.exceptions.append(e)
+
+
+class LoadCalendarServiceIdTestCase(util.TestCase):
+    def test_periods_are_keyed_by_whole_service_id(self):
+        archive = BytesIO()
+        zip_file = zipfile.ZipFile(archive, 'w')
+        zip_file.writestr(
+            'calendar.txt',
+            'service_id,monday,tuesday,wednesday,thursday,friday,saturday,'
+            'sunday,start_date,end_date\n'
+            'WEEK,1,1,1,1,1,0,0,20070101,20071231\n'
+            'WEEKEND,0,0,0,0,0,1,1,20070101,20071231\n'
+            'WEEK,1,1,1,1,1,0,0,20080101,20081231\n')
+        zip_file.writestr(
+            'calendar_dates.txt',
+            'service_id,date,exception_type\n'
+            'WEEKEND,20070704,1\n')
+        zip_file.close()
+
+        accumulator = ListProblemAccumulator()
+        problem_reporter = problems.ProblemReporter(accumulator)
+        schedule = transitfeed.Schedule(problem_reporter=problem_reporter)
+        loader = transitfeed.Loader(zip_object=zipfile.ZipFile(archive),
+                                    schedule=schedule,
+                                    error_reporter=problem_reporter)
+        loader._load_calendar()
+
+        self.assertEqual(1, len(accumulator.exceptions))
+        e = accumulator.exceptions[0]
+        self.assertEqual('duplicate_id', e.__class__.__name__)
+        self.assertEqual('service_id', e.column_name)
+        self.assertEqual('WEEK', e.value)
+
+        self.assertEqual(['WEEK', 'WEEKEND'], sorted(schedule.service_periods))
+        # The first WEEK row is kept
+        self.assertEqual('20071231', schedule.service_periods['WEEK'].end_date)
+        # The calendar_dates.txt row is merged into the calendar.txt period
+        weekend = schedule.service_periods['WEEKEND']
+        self.assertEqual('20070101', weekend.start_date)
+        self.assertEqual([False] * 5 + [True] * 2, weekend.day_of_week)
+        self.assertTrue(weekend.has_date_exception_on('20070704'))
+
+
 class CalendarDatesTxtIntegrationTestCase(util.MemoryZipTestCase):
     def test_date_outside_valid_range(self):
         """ exception date values in must be in [1900,2100] """
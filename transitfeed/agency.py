@@ -51,22 +51,26 @@ class Agency(GtfsObjectBase):
         """
         self._schedule = None
 
-        if not field_dict:
-            if name:
-                kwargs['agency_name'] = name
-            if url:
-                kwargs['agency_url'] = url
-            if timezone:
-                kwargs['agency_timezone'] = timezone
-            if id:
-                kwargs['agency_id'] = id
-            if lang:
-                kwargs['agency_lang'] = lang
-            if email:
-                kwargs['agency_email'] = email
-            field_dict = kwargs
-
-        self.__dict__.update(field_dict)
+        if field_dict:
+            self.__dict__.update(field_dict)
+            return
+
+        # Write straight into the instance dict, bypassing __setattr__. Named
+        # arguments take precedence over the same key passed through kwargs.
+        d = self.__dict__
+        d.update(kwargs)
+        if name:
+            d['agency_name'] = name
+        if url:
+            d['agency_url'] = url
+        if timezone:
+            d['agency_timezone'] = timezone
+        if id:
+            d['agency_id'] = id
+        if lang:
+            d['agency_lang'] = lang
+        if email:
+            d['agency_email'] = email
 
     def validate_agency_url(self, problems):
         return not util.validateURL(self.agency_url, 'agency_url', problems)
@@ -27,6 +27,11 @@ class FareAttribute(GtfsObjectBase):
     _FIELD_NAMES = _REQUIRED_FIELD_NAMES + ['transfer_duration']
     _TABLE_NAME = "fare_attributes"
 
+    # Allowed values for the enumerated integer fields, built once instead of
+    # creating a range object for every validated fare.
+    _PAYMENT_METHODS = (0, 1)
+    _TRANSFERS = (0, 1, 2)
+
     def __init__(self,
                  fare_id=None, price=None, currency_type=None,
                  payment_method=None, transfers=None, transfer_duration=None,
@@ -55,14 +60,14 @@ class FareAttribute(GtfsObjectBase):
             self.payment_method = int(self.payment_method)
         except (TypeError, ValueError):
             pass
-        if self.transfers == None or self.transfers == "":
+        if self.transfers in (None, ""):
             self.transfers = None
         else:
             try:
                 self.transfers = int(self.transfers)
             except (TypeError, ValueError):
                 pass
-        if self.transfer_duration == None or self.transfer_duration == "":
+        if self.transfer_duration in (None, ""):
             self.transfer_duration = None
         else:
             try:
@@ -106,11 +111,9 @@ class FareAttribute(GtfsObjectBase):
             problems.missing_value("fare_id")
 
     def validate_price(self, problems):
-        if self.price == None:
+        if self.price is None:
             problems.missing_value("price")
-        elif not isinstance(self.price, float) and not isinstance(self.price, int):
-            problems.invalid_value("price", self.price)
-        elif self.price < 0:
+        elif not isinstance(self.price, (float, int)) or self.price < 0:
             problems.invalid_value("price", self.price)
 
     def validate_currency_type(self, problems):
@@ -120,20 +123,20 @@ class FareAttribute(GtfsObjectBase):
             problems.invalid_value("currency_type", self.currency_type)
 
     def validate_payment_method(self, problems):
-        if self.payment_method == "" or self.payment_method == None:
+        if self.payment_method in (None, ""):
             problems.missing_value("payment_method")
         elif (not isinstance(self.payment_method, int) or
-              self.payment_method not in range(0, 2)):
+              self.payment_method not in self._PAYMENT_METHODS):
             problems.invalid_value("payment_method", self.payment_method)
 
     def validate_transfers(self, problems):
-        if not ((self.transfers == None) or
+        if not ((self.transfers is None) or
                 (isinstance(self.transfers, int) and
-                 self.transfers in range(0, 3))):
+                 self.transfers in self._TRANSFERS)):
             problems.invalid_value("transfers", self.transfers)
 
     def validate_transfer_duration(self, problems):
-        if ((self.transfer_duration != None) and
+        if ((self.transfer_duration is not None) and
                 not isinstance(self.transfer_duration, int)):
             problems.invalid_value("transfer_duration", self.transfer_duration)
         if self.transfer_duration and (self.transfer_duration < 0):
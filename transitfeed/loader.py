@@ -16,18 +16,19 @@
 
 from __future__ import absolute_import
 import codecs
+import collections
 try:
     import io as StringIO
 except ImportError:
     import cStringIO as StringIO
 import csv
+import mmap
 import os
 import re
 import zipfile
 
 from . import gtfsfactoryuser
 from . import problems
-from . import util
 
 
 class Loader:
@@ -69,6 +70,10 @@ class Loader:
         self._zip = zip_object
         self._load_stop_times_flag = load_stop_times
         self._gtfs_factory = gtfs_factory
+        # Lazily built by _get_file_name_set
+        self._file_name_set = None
+        # Set by _get_utf8_contents when the last file read wasn't valid utf-8
+        self._file_has_unicode_errors = False
 
     def _determine_format(self):
         """Determines whether the feed is in a form that we understand, and
@@ -112,7 +117,9 @@ class Loader:
 
     def _check_file_names(self):
         filenames = self._get_file_names()
-        known_filenames = self._gtfs_factory.get_known_filenames()
+        # get_known_filenames() is documented to return a list, so build a set
+        # once rather than relying on it supporting fast membership tests.
+        known_filenames = frozenset(self._gtfs_factory.get_known_filenames())
         for feed_file in filenames:
             if feed_file not in known_filenames:
                 if not feed_file.startswith('.'):
@@ -121,7 +128,13 @@ class Loader:
                     self._problems.UnknownFile(feed_file)
 
     def _get_utf8_contents(self, file_name):
-        """Check for errors in file_name and return a string for csv reader."""
+        """Check for errors in file_name and return a string for csv reader.
+
+        The contents are decoded from utf-8 once, here, rather than cell by cell
+        in the readers. Bytes which aren't valid utf-8 are replaced with U+FFFD
+        and self._file_has_unicode_errors is set so the affected cells can be
+        reported."""
+        self._file_has_unicode_errors = False
         contents = self._file_contents(file_name)
         if not contents:  # Missing file
             return
@@ -148,7 +161,16 @@ class Loader:
 
         # strip out any UTF-8 Byte Order Marker (otherwise it'll be
         # treated as part of the first column name, causing a mis-parse)
-        contents = contents.lstrip(codecs.BOM_UTF8)
+        if contents[0:3] == codecs.BOM_UTF8:
+            contents = memoryview(contents)[3:]
+        # str() decodes any buffer, including a memory mapped file, without
+        # first copying it into a bytes object.
+        try:
+            contents = str(contents, 'utf-8')
+        except UnicodeDecodeError:
+            # Replace all invalid characters with REPLACEMENT CHARACTER (U+FFFD)
+            contents = str(contents, 'utf-8', 'replace')
+            self._file_has_unicode_errors = True
         return contents
 
     def _read_csv_dict(self, file_name, cols, required, deprecated):
@@ -158,19 +180,18 @@ class Loader:
         contents = self._get_utf8_contents(file_name)
         if not contents:
             return
-        try:
-            eol_checker = [line for line in contents.decode('utf-8').split('\n')]
-        except TypeError:
-            eol_checker = util.EndOfLineChecker(StringIO.StringIO(contents), file_name, self._problems)
+        has_unicode_errors = self._file_has_unicode_errors
+        # Let csv.reader pull lines from a file-like object rather than handing
+        # it a list of every line in the file.
+        lines = StringIO.StringIO(contents, newline='')
         # The csv module doesn't provide a way to skip trailing space, but when I
         # checked 15/675 feeds had trailing space in a header row and 120 had spaces
         # after fields. Space after header fields can cause a serious parsing
         # problem, so warn. Space after body fields can cause a problem time,
         # integer and id fields; they will be validated at higher levels.
-        reader = csv.reader(eol_checker, skipinitialspace=True)
+        reader = csv.reader(lines, skipinitialspace=True)
 
         raw_header = next(reader)
-        header_occurrences = util.defaultdict(lambda: 0)
         header = []
         valid_columns = []  # Index into raw_header and raw_row
         for i, h in enumerate(raw_header):
@@ -191,8 +212,8 @@ class Loader:
                     type=problems.TYPE_WARNING)
             header.append(h_stripped)
             valid_columns.append(i)
-            header_occurrences[h_stripped] += 1
 
+        header_occurrences = collections.Counter(header)
         for name, count in header_occurrences.items():
             if count > 1:
                 self._problems.DuplicateColumn(
@@ -232,13 +253,17 @@ class Loader:
                 self._problems.DeprecatedColumn(file_name, deprecated_name, new_name,
                                                 header_context)
 
+        # The csv module already tokenizes in C; keep the per-row Python work
+        # down by hoisting loop invariants and measuring each row only once.
+        raw_header_len = len(raw_header)
         line_num = 1  # First line read by reader.next() above
         for raw_row in reader:
             line_num += 1
-            if len(raw_row) == 0:  # skip extra empty lines in file
+            raw_row_len = len(raw_row)
+            if raw_row_len == 0:  # skip extra empty lines in file
                 continue
 
-            if len(raw_row) > len(raw_header):
+            if raw_row_len > raw_header_len:
                 self._problems.other_problem('Found too many cells (commas) in line '
                                             '%d of file "%s".  Every row in the file '
                                             'should have the same number of cells as '
@@ -246,8 +271,7 @@ class Loader:
                                             (line_num, file_name),
                                             (file_name, line_num),
                                             type=problems.TYPE_WARNING)
-
-            if len(raw_row) < len(raw_header):
+            elif raw_row_len < raw_header_len:
                 self._problems.other_problem('Found missing cells (commas) in line '
                                             '%d of file "%s".  Every row in the file '
                                             'should have the same number of cells as '
@@ -256,22 +280,15 @@ class Loader:
                                             (file_name, line_num),
                                             type=problems.TYPE_WARNING)
 
-            # raw_row is a list of raw bytes which should be valid utf-8. Convert each
-            # valid_columns of raw_row into Unicode.
-            valid_values = []
-            unicode_error_columns = []  # index of valid_values elements with an error
-            for i in valid_columns:
-                try:
-                    valid_values.append(raw_row[i].decode('utf-8'))
-                except AttributeError:
-                    valid_values.append(raw_row[i])
-                except UnicodeDecodeError:
-                    # Replace all invalid characters with REPLACEMENT CHARACTER (U+FFFD)
-                    valid_values.append(codecs.getdecoder("utf8")
-                                        (raw_row[i], errors="replace")[0])
-                    unicode_error_columns.append(len(valid_values) - 1)
-                except IndexError:
-                    break
+            # valid_columns is in increasing order, so this keeps the cells up to
+            # the end of a short row.
+            valid_values = [raw_row[i] for i in valid_columns if i < raw_row_len]
+
+            # index of valid_values elements with an error
+            unicode_error_columns = []
+            if has_unicode_errors:
+                unicode_error_columns = [i for i, value in enumerate(valid_values)
+                                         if u'\ufffd' in value]
 
             # The error report may contain a dump of all values in valid_values so
             # problems can not be reported until after converting all of raw_row to
@@ -296,21 +313,13 @@ class Loader:
         contents = self._get_utf8_contents(file_name)
         if not contents:
             return
-        try:
-            # eol_checker = util.EndOfLineChecker(StringIO.BytesIO(contents), file_name, self._problems)
-            eol_checker = [line for line in contents.decode('utf-8').split('\n')]
-        except TypeError:
-            eol_checker = util.EndOfLineChecker(StringIO.StringIO(contents),
-                                                file_name, self._problems)
-        reader = csv.reader(eol_checker, delimiter=',')  # Use excel dialect
+        has_unicode_errors = self._file_has_unicode_errors
+        lines = StringIO.StringIO(contents, newline='')
+        reader = csv.reader(lines, delimiter=',')  # Use excel dialect
 
         header = next(reader)
-        # header = map(lambda x: x.strip(), header)  # trim any whitespace
-        header = [re.sub(r'[\s+]', '', x) for x in header]
-        header_occurrences = util.defaultdict(lambda: 0)
-        for column_header in header:
-            header_occurrences[column_header] += 1
-
+        header = [x.strip() for x in header]  # trim any whitespace
+        header_occurrences = collections.Counter(header)
         for name, count in header_occurrences.items():
             if count > 1:
                 self._problems.DuplicateColumn(
@@ -328,12 +337,15 @@ class Loader:
             self._problems.UnrecognizedColumn(file_name, col, header_context)
 
         # check for missing required columns
+        header_index = {}  # column name to the index of its first occurrence
+        for i, column_header in enumerate(header):
+            header_index.setdefault(column_header, i)
         col_index = [-1] * len(cols)
-        for i in range(len(cols)):
-            if cols[i] in header:
-                col_index[i] = header.index(cols[i])
-            elif cols[i] in required:
-                self._problems.missing_column(file_name, cols[i], header_context)
+        for i, col in enumerate(cols):
+            if col in header_index:
+                col_index[i] = header_index[col]
+            elif col in required:
+                self._problems.missing_column(file_name, col, header_context)
 
         # check for deprecated columns
         for (deprecated_name, new_name) in deprecated:
@@ -341,21 +353,25 @@ class Loader:
                 self._problems.DeprecatedColumn(file_name, deprecated_name, new_name,
                                                 header_context)
 
+        header_len = len(header)
+        cols_len = len(cols)
+        # (index into cols, index into row) for each column present in the file
+        present_columns = [(i, ci) for i, ci in enumerate(col_index) if ci >= 0]
         row_num = 1
         for row in reader:
             row_num += 1
-            if len(row) == 0:  # skip extra empty lines in file
+            row_len = len(row)
+            if row_len == 0:  # skip extra empty lines in file
                 continue
 
-            if len(row) > len(header):
+            if row_len > header_len:
                 self._problems.other_problem('Found too many cells (commas) in line '
                                             '%d of file "%s".  Every row in the file '
                                             'should have the same number of cells as '
                                             'the header (first line) does.' %
                                             (row_num, file_name), (file_name, row_num),
                                             type=problems.TYPE_WARNING)
-
-            if len(row) < len(header):
+            elif row_len < header_len:
                 self._problems.other_problem('Found missing cells (commas) in line '
                                             '%d of file "%s".  Every row in the file '
                                             'should have the same number of cells as '
@@ -363,23 +379,15 @@ class Loader:
                                             (row_num, file_name), (file_name, row_num),
                                             type=problems.TYPE_WARNING)
 
-            result = [None] * len(cols)
+            result = [None] * cols_len
             unicode_error_columns = []  # A list of column numbers with an error
-            for i in range(len(cols)):
-                ci = col_index[i]
-                if ci >= 0:
-                    if len(row) <= ci:  # handle short CSV rows
-                        result[i] = u''
-                    else:
-                        try:
-                            # result[i] = row[ci].decode('utf-8').strip()
-                            result[i] = re.sub(r'[\s+]', '', row[ci])
-                        except UnicodeDecodeError:
-                            # Replace all invalid characters with
-                            # REPLACEMENT CHARACTER (U+FFFD)
-                            result[i] = codecs.getdecoder("utf8")(row[ci],
-                                                                  errors="replace")[0].strip()
-                            unicode_error_columns.append(i)
+            for i, ci in present_columns:
+                if row_len <= ci:  # handle short CSV rows
+                    result[i] = u''
+                else:
+                    result[i] = row[ci].strip()
+                    if has_unicode_errors and u'\ufffd' in result[i]:
+                        unicode_error_columns.append(i)
 
             for i in unicode_error_columns:
                 self._problems.invalid_value(cols[i], result[i],
@@ -387,14 +395,24 @@ class Loader:
                                             (file_name, row_num, result, cols))
             yield (result, row_num, cols)
 
+    def _get_file_name_set(self):
+        """Returns a frozenset of the names of the files in the feed.
+
+        The set is built on first use so that repeated _has_file calls don't
+        rebuild the zip name list or stat every file again."""
+        if self._file_name_set is None:
+            if self._zip:
+                self._file_name_set = frozenset(self._zip.namelist())
+            else:
+                self._file_name_set = frozenset(
+                    name for name in os.listdir(self._path)
+                    if os.path.isfile(os.path.join(self._path, name)))
+        return self._file_name_set
+
     def _has_file(self, file_name):
         """Returns True if there's a file in the current feed with the
            given file_name in the current feed."""
-        if self._zip:
-            return file_name in self._zip.namelist()
-        else:
-            file_path = os.path.join(self._path, file_name)
-            return os.path.exists(file_path) and os.path.isfile(file_path)
+        return file_name in self._get_file_name_set()
 
     def _file_contents(self, file_name):
         results = None
@@ -406,8 +424,14 @@ class Loader:
                 return None
         else:
             try:
-                data_file = open(os.path.join(self._path, file_name), 'rb')
-                results = data_file.read()
+                with open(os.path.join(self._path, file_name), 'rb') as data_file:
+                    # Map the file instead of reading it into memory. The
+                    # mapping stays valid after the file is closed and is
+                    # unmapped once the decoded contents have been built.
+                    results = mmap.mmap(data_file.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+            except ValueError:  # an empty file can't be mapped
+                results = None
             except IOError:  # file not found
                 self._problems.MissingFile(file_name)
                 return None
@@ -417,31 +441,36 @@ class Loader:
         return results
 
     def _load_feed(self):
-        loading_order = self._gtfs_factory.get_loading_order()
+        gtfs_factory = self._gtfs_factory
+        problems = self._problems
+        schedule = self._schedule
+        loading_order = gtfs_factory.get_loading_order()
         for filename in loading_order:
-            if not self._gtfs_factory.IsFileRequired(filename) and \
+            if not gtfs_factory.IsFileRequired(filename) and \
                     not self._has_file(filename):
                 pass  # File is not required, and feed does not have it.
             else:
-                object_class = self._gtfs_factory.GetGtfsClassByFileName(filename)
+                object_class = gtfs_factory.GetGtfsClassByFileName(filename)
                 for (d, row_num, header, row) in self._read_csv_dict(
                         filename,
                         object_class._FIELD_NAMES,
                         object_class._REQUIRED_FIELD_NAMES,
                         object_class._DEPRECATED_FIELD_NAMES):
-                    self._problems.set_file_context(filename, row_num, row, header)
+                    problems.set_file_context(filename, row_num, row, header)
                     instance = object_class(field_dict=d)
-                    instance.set_gtfs_factory(self._gtfs_factory)
-                    if not instance.ValidateBeforeAdd(self._problems):
+                    instance.set_gtfs_factory(gtfs_factory)
+                    if not instance.ValidateBeforeAdd(problems):
                         continue
-                    instance.AddToSchedule(self._schedule, self._problems)
-                    instance.ValidateAfterAdd(self._problems)
-                    self._problems.clear_context()
+                    instance.AddToSchedule(schedule, problems)
+                    instance.ValidateAfterAdd(problems)
+                problems.clear_context()
 
     def _load_calendar(self):
         file_name = 'calendar.txt'
         file_name_dates = 'calendar_dates.txt'
-        if not self._has_file(file_name) and not self._has_file(file_name_dates):
+        has_calendar = self._has_file(file_name)
+        has_calendar_dates = self._has_file(file_name_dates)
+        if not has_calendar and not has_calendar_dates:
             self._problems.MissingFile(file_name)
             return
 
@@ -451,7 +480,7 @@ class Loader:
         service_period_class = self._gtfs_factory.ServicePeriod
 
         # process calendar.txt
-        if self._has_file(file_name):
+        if has_calendar:
             has_useful_contents = False
             for (row, row_num, cols) in \
                     self._read_csv(file_name,
@@ -463,14 +492,14 @@ class Loader:
 
                 period = service_period_class(field_list=row)
 
-                if ''.join(period.service_id) in periods:
+                if period.service_id in periods:
                     self._problems.duplicate_id('service_id', period.service_id)
                 else:
-                    periods[period.service_id[0]] = (period, context)
-                self._problems.clear_context()
+                    periods[period.service_id] = (period, context)
+            self._problems.clear_context()
 
         # process calendar_dates.txt
-        if self._has_file(file_name_dates):
+        if has_calendar_dates:
             # ['service_id', 'date', 'exception_type']
             for (row, row_num, cols) in \
                     self._read_csv(file_name_dates,
@@ -482,28 +511,27 @@ class Loader:
 
                 service_id = row[0]
 
-                period = None
-                if ''.join(service_id)in periods:
-                    period = periods[''.join(service_id)][0]
+                if service_id in periods:
+                    period = periods[service_id][0]
                 else:
                     period = service_period_class(service_id)
-                    periods[''.join(period.service_id)] = (period, context)
+                    periods[service_id] = (period, context)
 
-                exception_type = ''.join(row[2])
+                exception_type = row[2]
                 if exception_type == u'1':
                     period.set_date_has_service(row[1], True, self._problems)
                 elif exception_type == u'2':
                     period.set_date_has_service(row[1], False, self._problems)
                 else:
                     self._problems.invalid_value('exception_type', exception_type)
-                self._problems.clear_context()
+            self._problems.clear_context()
 
         # Now insert the periods into the schedule object, so that they're
         # validated with both calendar and calendar_dates info present
         for period, context in periods.values():
             self._problems.set_file_context(*context)
             self._schedule.add_service_period_object(period, self._problems)
-            self._problems.clear_context()
+        self._problems.clear_context()
 
     def _load_shapes(self):
         file_name = 'shapes.txt'
@@ -512,28 +540,28 @@ class Loader:
         shapes = {}  # shape_id to shape object
 
         shape_class = self._gtfs_factory.Shape
+        shapepoint_class = self._gtfs_factory.ShapePoint
+        problems = self._problems
 
         for (d, row_num, header, row) in self._read_csv_dict(
                 file_name,
                 shape_class._FIELD_NAMES,
                 shape_class._REQUIRED_FIELD_NAMES,
                 shape_class._DEPRECATED_FIELD_NAMES):
-            file_context = (file_name, row_num, row, header)
-            self._problems.set_file_context(*file_context)
+            problems.set_file_context(file_name, row_num, row, header)
 
-            shapepoint = self._gtfs_factory.ShapePoint(field_dict=d)
-            if not shapepoint.parse_attributes(self._problems):
+            shapepoint = shapepoint_class(field_dict=d)
+            if not shapepoint.parse_attributes(problems):
                 continue
 
-            if shapepoint.shape_id in shapes:
-                shape = shapes[shapepoint.shape_id]
-            else:
+            shape = shapes.get(shapepoint.shape_id)
+            if shape is None:
                 shape = shape_class(shapepoint.shape_id)
                 shape.set_gtfs_factory(self._gtfs_factory)
                 shapes[shapepoint.shape_id] = shape
 
-            shape.add_shape_point_object_unsorted(shapepoint, self._problems)
-            self._problems.clear_context()
+            shape.add_shape_point_object_unsorted(shapepoint, problems)
+        problems.clear_context()
 
         for shape_id, shape in list(shapes.items()):
             self._schedule.add_shape_object(shape, self._problems)
@@ -541,13 +569,18 @@ class Loader:
 
     def _load_stop_times(self):
         stop_time_class = self._gtfs_factory.StopTime
+        # Bind the lookups used for every row to locals; stop_times.txt is
+        # usually by far the largest file in a feed.
+        problems = self._problems
+        schedule = self._schedule
+        stops = schedule.stops
+        trips = schedule.trips
 
         for (row, row_num, cols) in self._read_csv('stop_times.txt',
                                                      stop_time_class._FIELD_NAMES,
                                                      stop_time_class._REQUIRED_FIELD_NAMES,
                                                      stop_time_class._DEPRECATED_FIELD_NAMES):
-            file_context = ('stop_times.txt', row_num, row, cols)
-            self._problems.set_file_context(*file_context)
+            problems.set_file_context('stop_times.txt', row_num, row, cols)
 
             (trip_id, arrival_time, departure_time, stop_id, stop_sequence,
              stop_headsign, pickup_type, drop_off_type, shape_dist_traveled,
@@ -556,23 +589,23 @@ class Loader:
             try:
                 sequence = int(stop_sequence)
             except (TypeError, ValueError):
-                self._problems.invalid_value('stop_sequence', stop_sequence,
-                                            'This should be a number.')
+                problems.invalid_value('stop_sequence', stop_sequence,
+                                       'This should be a number.')
                 continue
             if sequence < 0:
-                self._problems.invalid_value('stop_sequence', sequence,
-                                            'Sequence numbers should be 0 or higher.')
+                problems.invalid_value('stop_sequence', sequence,
+                                       'Sequence numbers should be 0 or higher.')
 
-            if stop_id not in self._schedule.stops:
-                self._problems.invalid_value('stop_id', stop_id,
-                                            'This value wasn\'t defined in stops.txt')
+            stop = stops.get(stop_id)
+            if stop is None:
+                problems.invalid_value('stop_id', stop_id,
+                                       'This value wasn\'t defined in stops.txt')
                 continue
-            stop = self._schedule.stops[stop_id]
-            if trip_id not in self._schedule.trips:
-                self._problems.invalid_value('trip_id', trip_id,
-                                            'This value wasn\'t defined in trips.txt')
+            trip = trips.get(trip_id)
+            if trip is None:
+                problems.invalid_value('trip_id', trip_id,
+                                       'This value wasn\'t defined in trips.txt')
                 continue
-            trip = self._schedule.trips[trip_id]
 
             # If self._problems.Report returns then StopTime.__init__ will return
             # even if the StopTime object has an error. Thus this code may add a
@@ -582,12 +615,12 @@ class Loader:
             # wrap problems and a better solution is to move all validation out of
             # __init__. For now make sure Trip.GetStopTimes gets a problem reporter
             # when called from Trip.Validate.
-            stop_time = stop_time_class(self._problems, stop,
+            stop_time = stop_time_class(problems, stop,
                                         arrival_time, departure_time, stop_headsign, pickup_type,
                                         drop_off_type, shape_dist_traveled, stop_sequence=sequence,
                                         timepoint=timepoint)
-            trip._AddStopTimeObjectUnordered(stop_time, self._schedule)
-            self._problems.clear_context()
+            trip._AddStopTimeObjectUnordered(stop_time, schedule)
+        problems.clear_context()
 
         # stop_times are validated in Trip.ValidateChildren, called by
         # Schedule.Validate
@@ -608,6 +641,7 @@ class Loader:
         if self._zip:
             self._zip.close()
             self._zip = None
+            self._file_name_set = None
 
         if self._extra_validation:
             self._schedule.Validate(self._problems, validate_children=False)
@@ -17,9 +17,11 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import collections
 import logging
+import re
+import sys
 import time
-from functools import reduce
 
 from . import util
 from .errors import TYPE_ERROR, TYPE_WARNING, TYPE_NOTICE, ALL_TYPES
@@ -28,6 +30,11 @@ MAX_DISTANCE_FROM_STOP_TO_SHAPE = 1000
 MAX_DISTANCE_BETWEEN_STOP_AND_PARENT_STATION_WARNING = 100.0
 MAX_DISTANCE_BETWEEN_STOP_AND_PARENT_STATION_ERROR = 1000.0
 
+# Matches the names of the %(name)s style placeholders in ERROR_TEXT.
+_FORMAT_KEY_RE = re.compile(r'%\((\w+)\)')
+
+_ALL_TYPES_SET = frozenset(ALL_TYPES)
+
 
 class ProblemReporter(object):
     """Base class for problem reporters. Tracks the current context and creates
@@ -50,10 +57,17 @@ class ProblemReporter(object):
     def clear_context(self):
         """Clear any previous context."""
         self._context = None
+        self._context_dict = None
 
     def set_file_context(self, file_name, row_num, row, headers):
         """Save the current context to be output with any errors.
 
+        The context replaces any previous one, so code reporting problems for
+        many rows in turn only needs to call clear_context after the last row.
+
+        row and headers are not copied: every problem reported for the row shares
+        them, so callers must not modify them after passing them in.
+
         Args:
           file_name: string
           row_num: int
@@ -61,6 +75,19 @@ class ProblemReporter(object):
           headers: list of column headers, its order corresponding to row's
         """
         self._context = (file_name, row_num, row, headers)
+        # Every problem reported for this row shares the same context, so build
+        # the dict merged into each exception once here instead of per problem.
+        # This matches context_tuple_to_dict, unrolled for the fixed layout.
+        context_dict = {}
+        if file_name != '' and file_name is not None:
+            context_dict['file_name'] = file_name
+        if row_num != '' and row_num is not None:  # Don't ignore int(0)
+            context_dict['row_num'] = row_num
+        if row != '' and row is not None:
+            context_dict['row'] = row
+        if headers != '' and headers is not None:
+            context_dict['headers'] = headers
+        self._context_dict = context_dict
 
     def get_file_context(self):
         return self._context
@@ -69,259 +96,226 @@ class ProblemReporter(object):
         """report an exception to the Problem Accumulator"""
         self.accumulator._report(e)
 
-    def new_version_available(self, version):
-        e = new_version_available(version=version, type=TYPE_NOTICE,
-                                  url='https://github.com/google/transitfeed')
+    def add_all_to_accumulator(self, es):
+        """report a sequence of exceptions to the Problem Accumulator at once"""
+        self.accumulator._report_many(es)
+
+    def _add_problem(self, problem_class, context, problem_type,
+                     use_file_context=True, **kwargs):
+        """Report a problem_class exception with the current file context.
+
+        This is the shared path for the methods below. Nothing is built if the
+        accumulator doesn't want problems of problem_type. Problems that never
+        relate to a row pass use_file_context=False to skip the file context.
+        """
+        if not self.accumulator.wants(problem_type):
+            return
+        if use_file_context:
+            e = problem_class(context=context, context_dict2=self._context_dict,
+                              type=problem_type, **kwargs)
+        else:
+            e = problem_class(context=context, type=problem_type, **kwargs)
         self.add_to_accumulator(e)
 
+    def new_version_available(self, version):
+        self._add_problem(new_version_available, None, TYPE_NOTICE,
+                          use_file_context=False, version=version,
+                          url='https://github.com/google/transitfeed')
+
     def feed_not_found(self, feed_name, context=None, type=TYPE_ERROR):
-        e = feed_not_found(feed_name=feed_name, context=context,
-                           context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(feed_not_found, context, type, feed_name=feed_name)
 
     def unknown_format(self, feed_name, context=None, type=TYPE_ERROR):
-        e = unknown_format(feed_name=feed_name, context=context,
-                           context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(unknown_format, context, type, feed_name=feed_name)
 
     def file_format(self, problem, context=None, type=TYPE_ERROR):
-        e = file_format(problem=problem, context=context,
-                        context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(file_format, context, type, problem=problem)
 
     def missing_file(self, file_name, context=None, type=TYPE_ERROR):
-        e = missing_file(file_name=file_name, context=context,
-                         context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(missing_file, context, type, file_name=file_name)
 
     def unknown_file(self, file_name, context=None, type=TYPE_WARNING):
-        e = unknown_file(file_name=file_name, context=context,
-                         context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(unknown_file, context, type, file_name=file_name)
 
     def empty_file(self, file_name, context=None, type=TYPE_ERROR):
-        e = empty_file(file_name=file_name, context=context,
-                       context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(empty_file, context, type, file_name=file_name)
 
     def missing_column(self, file_name, column_name, context=None,
                        type=TYPE_ERROR):
-        e = missing_column(file_name=file_name, column_name=column_name,
-                           context=context, context2=self._context,
-                           type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(missing_column, context, type, file_name=file_name,
+                          column_name=column_name)
 
     def unrecognized_column(self, file_name, column_name, context=None,
                             type=TYPE_WARNING):
-        e = unrecognized_column(file_name=file_name, column_name=column_name,
-                                context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(unrecognized_column, context, type,
+                          file_name=file_name, column_name=column_name)
 
     def deprecated_column(self, file_name, column_name, new_name, context=None,
                           type=TYPE_WARNING):
         reason = None
         if not util.is_empty(new_name):
             reason = 'Please use the new column "%s" instead.' % (new_name)
-        e = deprecated_column(file_name=file_name, column_name=column_name,
-                              reason=reason, context=context, context2=self._context,
-                              type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(deprecated_column, context, type, file_name=file_name,
+                          column_name=column_name, reason=reason)
 
     def csv_syntax(self, description=None, context=None, type=TYPE_ERROR):
-        e = csv_syntax(description=description, context=context,
-                       context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(csv_syntax, context, type, description=description)
 
     def duplicate_column(self, file_name, header, count, type=TYPE_ERROR,
                          context=None):
-        e = duplicate_column(file_name=file_name,
-                             header=header,
-                             count=count,
-                             type=type,
-                             context=context,
-                             context2=self._context)
-        self.add_to_accumulator(e)
+        self._add_problem(duplicate_column, context, type, file_name=file_name,
+                          header=header, count=count)
 
     def missing_value(self, column_name, reason=None, context=None,
                       type=TYPE_ERROR):
-        e = missing_value(column_name=column_name, reason=reason, context=context,
-                          context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(missing_value, context, type, column_name=column_name,
+                          reason=reason)
 
     def invalid_value(self, column_name, value, reason=None, context=None,
                       type=TYPE_ERROR):
-        e = invalid_value(column_name=column_name, value=value, reason=reason,
-                          context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(invalid_value, context, type, column_name=column_name,
+                          value=value, reason=reason)
 
     def invalid_float_value(self, value, reason=None, context=None,
                             type=TYPE_WARNING):
-        e = invalid_float_value(value=value, reason=reason, context=context,
-                                context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(invalid_float_value, context, type, value=value,
+                          reason=reason)
 
     def invalid_non_negative_integer_value(self, value, reason=None, context=None,
                                            type=TYPE_WARNING):
-        e = invalid_non_negative_integer_value(value=value, reason=reason,
-                                               context=context, context2=self._context,
-                                               type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(invalid_non_negative_integer_value, context, type,
+                          value=value, reason=reason)
 
     def duplicate_id(self, column_names, values, context=None, type=TYPE_ERROR):
         if isinstance(column_names, (tuple, list)):
             column_names = '(' + ', '.join(column_names) + ')'
         if isinstance(values, tuple):
             values = '(' + ', '.join(values) + ')'
-        e = duplicate_id(column_name=column_names, value=values,
-                          context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(duplicate_id, context, type, column_name=column_names,
+                          value=values)
 
     def invalid_agency_id(self, column_name, value, relating_type, relating_id,
                            context=None, type=TYPE_ERROR):
-        e = invalid_agency_id(column_name=column_name, value=value,
-                               relating_type=relating_type, relating_id=relating_id,
-                               context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(invalid_agency_id, context, type,
+                          column_name=column_name, value=value,
+                          relating_type=relating_type, relating_id=relating_id)
 
     def unused_stop(self, stop_id, stop_name, context=None, type=TYPE_WARNING):
-        e = unused_stop(stop_id=stop_id, stop_name=stop_name,
-                        context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(unused_stop, context, type, stop_id=stop_id,
+                          stop_name=stop_name)
 
     def used_station(self, stop_id, stop_name, context=None, type=TYPE_ERROR):
-        e = used_station(stop_id=stop_id, stop_name=stop_name,
-                         context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(used_station, context, type, stop_id=stop_id,
+                          stop_name=stop_name)
 
     def stop_too_far_from_parent_station(self, stop_id, stop_name, parent_stop_id,
                                          parent_stop_name, distance,
                                          type=TYPE_WARNING, context=None):
-        e = stop_too_far_from_parent_station(
-            stop_id=stop_id, stop_name=stop_name,
-            parent_stop_id=parent_stop_id,
-            parent_stop_name=parent_stop_name, distance=distance,
-            context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(stop_too_far_from_parent_station, context, type,
+                          stop_id=stop_id, stop_name=stop_name,
+                          parent_stop_id=parent_stop_id,
+                          parent_stop_name=parent_stop_name, distance=distance)
 
     def stops_too_close(self, stop_name_a, stop_id_a, stop_name_b, stop_id_b,
                         distance, type=TYPE_WARNING, context=None):
-        e = stops_too_close(
-            stop_name_a=stop_name_a, stop_id_a=stop_id_a, stop_name_b=stop_name_b,
-            stop_id_b=stop_id_b, distance=distance, context=context,
-            context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(stops_too_close, context, type,
+                          stop_name_a=stop_name_a, stop_id_a=stop_id_a,
+                          stop_name_b=stop_name_b, stop_id_b=stop_id_b,
+                          distance=distance)
 
     def stations_too_close(self, stop_name_a, stop_id_a, stop_name_b, stop_id_b,
                            distance, type=TYPE_WARNING, context=None):
-        e = stations_too_close(
-            stop_name_a=stop_name_a, stop_id_a=stop_id_a, stop_name_b=stop_name_b,
-            stop_id_b=stop_id_b, distance=distance, context=context,
-            context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(stations_too_close, context, type,
+                          stop_name_a=stop_name_a, stop_id_a=stop_id_a,
+                          stop_name_b=stop_name_b, stop_id_b=stop_id_b,
+                          distance=distance)
 
     def different_station_too_close(self, stop_name, stop_id,
                                     station_stop_name, station_stop_id,
                                     distance, type=TYPE_WARNING, context=None):
-        e = different_station_too_close(
-            stop_name=stop_name, stop_id=stop_id,
-            station_stop_name=station_stop_name, station_stop_id=station_stop_id,
-            distance=distance, context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(different_station_too_close, context, type,
+                          stop_name=stop_name, stop_id=stop_id,
+                          station_stop_name=station_stop_name,
+                          station_stop_id=station_stop_id, distance=distance)
 
     def stop_too_far_from_shape_with_dist_traveled(self, trip_id, stop_name, stop_id,
                                                    shape_dist_traveled, shape_id,
                                                    distance, max_distance,
                                                    type=TYPE_WARNING):
-        e = stop_too_far_from_shape_with_dist_traveled(
-            trip_id=trip_id, stop_name=stop_name, stop_id=stop_id,
-            shape_dist_traveled=shape_dist_traveled, shape_id=shape_id,
-            distance=distance, max_distance=max_distance, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(stop_too_far_from_shape_with_dist_traveled, None, type,
+                          use_file_context=False, trip_id=trip_id,
+                          stop_name=stop_name, stop_id=stop_id,
+                          shape_dist_traveled=shape_dist_traveled,
+                          shape_id=shape_id, distance=distance,
+                          max_distance=max_distance)
 
     def expiration_date(self, expiration, expiration_origin_file, context=None):
-        e = expiration_date(expiration=expiration,
-                            expiration_origin_file=expiration_origin_file,
-                            context=context, context2=self._context,
-                            type=TYPE_WARNING)
-        self.add_to_accumulator(e)
+        self._add_problem(expiration_date, context, TYPE_WARNING,
+                          expiration=expiration,
+                          expiration_origin_file=expiration_origin_file)
 
     def future_service(self, start_date, start_date_origin_file, context=None):
-        e = future_service(start_date=start_date,
-                           start_date_origin_file=start_date_origin_file,
-                           context=context, context2=self._context,
-                           type=TYPE_WARNING)
-        self.add_to_accumulator(e)
+        self._add_problem(future_service, context, TYPE_WARNING,
+                          start_date=start_date,
+                          start_date_origin_file=start_date_origin_file)
 
     def date_outside_valid_range(self, column_name, value, range_start_year,
                                  range_end_year, reason=None, context=None,
                                  type=TYPE_ERROR):
-        e = date_outside_valid_range(column_name=column_name, value=value,
-                                     reason=reason, range_start_year=range_start_year,
-                                     range_end_year=range_end_year, context=context,
-                                     context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(date_outside_valid_range, context, type,
+                          column_name=column_name, value=value, reason=reason,
+                          range_start_year=range_start_year,
+                          range_end_year=range_end_year)
 
     def no_service_exceptions(self, start, end, type=TYPE_WARNING, context=None):
-        e = no_service_exceptions(start=start, end=end, context=context,
-                                  context2=self._context, type=type);
-        self.add_to_accumulator(e)
+        self._add_problem(no_service_exceptions, context, type, start=start,
+                          end=end)
 
     def invalid_line_end(self, bad_line_end, context=None, type=TYPE_WARNING):
         """bad_line_end is a human readable string."""
-        e = invalid_line_end(bad_line_end=bad_line_end, context=context,
-                             context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(invalid_line_end, context, type,
+                          bad_line_end=bad_line_end)
 
     def too_fast_travel(self, trip_id, prev_stop, next_stop, dist, time, speed,
                         type=TYPE_ERROR):
-        e = too_fast_travel(trip_id=trip_id, prev_stop=prev_stop,
-                            next_stop=next_stop, time=time, dist=dist, speed=speed,
-                            context=None, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(too_fast_travel, None, type, trip_id=trip_id,
+                          prev_stop=prev_stop, next_stop=next_stop, time=time,
+                          dist=dist, speed=speed)
 
     def stop_with_multiple_route_types(self, stop_name, stop_id, route_id1, route_id2,
                                        context=None, type=TYPE_WARNING):
-        e = stop_with_multiple_route_types(stop_name=stop_name, stop_id=stop_id,
-                                           route_id1=route_id1, route_id2=route_id2,
-                                           context=context, context2=self._context,
-                                           type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(stop_with_multiple_route_types, context, type,
+                          stop_name=stop_name, stop_id=stop_id,
+                          route_id1=route_id1, route_id2=route_id2)
 
     def duplicate_trip(self, trip_id1, route_id1, trip_id2, route_id2,
                        context=None, type=TYPE_WARNING):
-        e = duplicate_trip(trip_id1=trip_id1, route_id1=route_id1, trip_id2=trip_id2,
-                           route_id2=route_id2, context=context,
-                           context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(duplicate_trip, context, type, trip_id1=trip_id1,
+                          route_id1=route_id1, trip_id2=trip_id2,
+                          route_id2=route_id2)
 
     def overlapping_trips_in_same_block(self, trip_id1, trip_id2, block_id,
                                         context=None, type=TYPE_WARNING):
-        e = overlapping_trips_in_same_block(trip_id1=trip_id1, trip_id2=trip_id2,
-                                            block_id=block_id, context=context,
-                                            context2=self._context, type=type);
-        self.add_to_accumulator(e)
+        self._add_problem(overlapping_trips_in_same_block, context, type,
+                          trip_id1=trip_id1, trip_id2=trip_id2,
+                          block_id=block_id)
 
     def transfer_distance_too_big(self, from_stop_id, to_stop_id, distance,
                                   context=None, type=TYPE_ERROR):
-        e = transfer_distance_too_big(from_stop_id=from_stop_id, to_stop_id=to_stop_id,
-                                      distance=distance, context=context,
-                                      context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(transfer_distance_too_big, context, type,
+                          from_stop_id=from_stop_id, to_stop_id=to_stop_id,
+                          distance=distance)
 
     def transfer_walking_speed_too_fast(self, from_stop_id, to_stop_id, distance,
                                         transfer_time, context=None,
                                         type=TYPE_WARNING):
-        e = transfer_walking_speed_too_fast(from_stop_id=from_stop_id,
-                                            transfer_time=transfer_time,
-                                            distance=distance,
-                                            to_stop_id=to_stop_id, context=context,
-                                            context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(transfer_walking_speed_too_fast, context, type,
+                          from_stop_id=from_stop_id,
+                          transfer_time=transfer_time, distance=distance,
+                          to_stop_id=to_stop_id)
 
     def other_problem(self, description, context=None, type=TYPE_ERROR):
-        e = other_problem(description=description,
-                          context=context, context2=self._context, type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(other_problem, context, type, description=description)
 
     def too_many_days_without_service(self,
                                       first_day_without_service,
@@ -329,36 +323,27 @@ class ProblemReporter(object):
                                       consecutive_days_without_service,
                                       context=None,
                                       type=TYPE_WARNING):
-        e = too_many_days_without_service(
-            first_day_without_service=first_day_without_service,
-            last_day_without_service=last_day_without_service,
-            consecutive_days_without_service=consecutive_days_without_service,
-            context=context,
-            context2=self._context,
-            type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(too_many_days_without_service, context, type,
+                          first_day_without_service=first_day_without_service,
+                          last_day_without_service=last_day_without_service,
+                          consecutive_days_without_service=consecutive_days_without_service)
 
     def minimum_transfer_time_set_with_invalid_transfer_type(self,
                                                              transfer_type=None,
                                                              context=None,
                                                              type=TYPE_ERROR):
-        e = minimum_transfer_time_set_with_invalid_transfer_type(context=context,
-                                                                 context2=self._context, transfer_type=transfer_type,
-                                                                 type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(minimum_transfer_time_set_with_invalid_transfer_type,
+                          context, type, transfer_type=transfer_type)
 
     def too_many_consecutive_stop_times_with_same_time(self,
                                                        trip_id,
                                                        number_of_stop_times,
                                                        time_in_secs,
                                                        type=TYPE_WARNING):
-        e = too_many_consecutive_stop_times_with_same_time(trip_id=trip_id,
-                                                           number_of_stop_times=number_of_stop_times,
-                                                           stop_time=util.FormatSecondsSinceMidnight(time_in_secs),
-                                                           context=None,
-                                                           context2=self._context,
-                                                           type=type)
-        self.add_to_accumulator(e)
+        self._add_problem(too_many_consecutive_stop_times_with_same_time,
+                          None, type, trip_id=trip_id,
+                          number_of_stop_times=number_of_stop_times,
+                          stop_time=util.FormatSecondsSinceMidnight(time_in_secs))
 
 
 class ProblemAccumulatorInterface(object):
@@ -368,15 +353,46 @@ class ProblemAccumulatorInterface(object):
         raise NotImplementedError("Please use a concrete Problem Accumulator that "
                                   "implements error and warning handling.")
 
+    def _report_many(self, es):
+        """Report each exception in the iterable es, in order.
+
+        Accumulators that write their output can override this to write all of
+        it at once.
+        """
+        for e in es:
+            self._report(e)
+
+    def wants(self, problem_type):
+        """Return False if problems of problem_type would be discarded.
+
+        ProblemReporter checks this before building an exception, so an
+        accumulator that drops a whole problem type can override this to skip
+        that work entirely.
+
+        Args:
+          problem_type: one of TYPE_ERROR, TYPE_WARNING or TYPE_NOTICE
+        """
+        return True
+
 
 class SimpleProblemAccumulator(ProblemAccumulatorInterface):
     """This is a basic problem accumulator that just prints to console."""
 
     def _report(self, e):
+        sys.stdout.write(self._format_report(e))
+
+    def _report_many(self, es):
+        sys.stdout.write(''.join([self._format_report(e) for e in es]))
+
+    def _format_report(self, e):
+        """Return the console output for e, ending with a newline."""
+        lines = []
         context = e.format_context()
         if context:
-            print(context)
-        print(util.encode_str(self._line_wrap(e.format_problem(), 78)))
+            lines.append(context)
+        lines.append(str(util.encode_str(self._line_wrap(e.format_problem(), 78))))
+        lines.append('')
+        return '\n'.join(lines)
 
     @staticmethod
     def _line_wrap(text, width):
@@ -385,35 +401,52 @@ class SimpleProblemAccumulator(ProblemAccumulatorInterface):
         and most spaces in the text. Expects that existing line
         breaks are posix newlines (\n).
 
-        Taken from:
+        Based on:
         http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/148061
         """
-        return reduce(lambda line, word, width=width: '%s%s%s' %
-                                                      (line,
-                                                       ' \n'[(len(line) - line.rfind('\n') - 1 +
-                                                              len(word.split('\n', 1)[0]) >= width)],
-                                                       word),
-                      text.split(' ')
-                      )
+        words = text.split(' ')
+        parts = [words[0]]
+        # Length of the last line in parts, so it never has to be rescanned.
+        col = len(words[0]) - words[0].rfind('\n') - 1
+        for word in words[1:]:
+            newline = word.find('\n')
+            first_len = len(word) if newline < 0 else newline
+            if col + first_len >= width:
+                parts.append('\n')
+                col = 0
+            else:
+                parts.append(' ')
+                col += 1
+            parts.append(word)
+            if newline < 0:
+                col += len(word)
+            else:
+                col = len(word) - word.rfind('\n') - 1
+        return ''.join(parts)
 
 
 class ExceptionWithContext(Exception):
-    def __init__(self, context=None, context2=None, **kwargs):
+    def __init__(self, context=None, context2=None, context_dict2=None,
+                 **kwargs):
         """Initialize an exception object, saving all keyword arguments in self.
         context and context2, if present, must be a tuple of (file_name, row_num,
-        row, headers). context2 comes from ProblemReporter.set_file_context. context
-        was passed in with the keyword arguments. context2 is ignored if context
-        is present."""
+        row, headers). context was passed in with the keyword arguments.
+        context_dict2 is the same context already converted with
+        context_tuple_to_dict, as cached by ProblemReporter.set_file_context.
+        context2 and context_dict2 are ignored if context is present."""
         Exception.__init__(self)
 
         if context:
             self.__dict__.update(self.context_tuple_to_dict(context))
+        elif context_dict2:
+            self.__dict__.update(context_dict2)
         elif context2:
             self.__dict__.update(self.context_tuple_to_dict(context2))
         self.__dict__.update(kwargs)
 
-        if ('type' in kwargs) and (kwargs['type'] in ALL_TYPES):
-            self._type = kwargs['type']
+        problem_type = kwargs.get('type', TYPE_ERROR)
+        if problem_type in _ALL_TYPES_SET:
+            self._type = problem_type
         else:
             self._type = TYPE_ERROR
 
@@ -460,6 +493,28 @@ class ExceptionWithContext(Exception):
             d[k] = util.encode_str(v)
         return d
 
+    @classmethod
+    def _get_format_keys(cls):
+        """Return the attribute names referenced by cls.ERROR_TEXT, plus reason.
+
+        The names are parsed once per class and cached on it. Classes that
+        override format_problem instead of setting ERROR_TEXT list the names
+        they use in _format_keys.
+        """
+        keys = cls.__dict__.get('_format_keys')
+        if keys is None:
+            keys = set(_FORMAT_KEY_RE.findall(cls.ERROR_TEXT))
+            keys.add('reason')
+            keys = cls._format_keys = tuple(keys)
+        return keys
+
+    def _get_used_dict_to_format(self):
+        """Like get_dict_to_format, but only encodes the attributes that the
+        message actually uses, as listed by _get_format_keys."""
+        attributes = self.__dict__
+        return {k: util.encode_str(attributes[k])
+                for k in self._get_format_keys() if k in attributes}
+
     def format_problem(self, d=None):
         """Return a text string describing the problem.
 
@@ -467,7 +522,7 @@ class ExceptionWithContext(Exception):
           d: map returned by get_dict_to_format with  with formatting added
         """
         if not d:
-            d = self.get_dict_to_format()
+            d = self._get_used_dict_to_format()
 
         output_error_text = self.__class__.ERROR_TEXT % d
         if ('reason' in d) and d['reason']:
@@ -477,35 +532,40 @@ class ExceptionWithContext(Exception):
 
     def format_context(self):
         """Return a text string describing the context"""
-        text = ''
-        if hasattr(self, 'feed_name'):
-            text += "In feed '%s': " % self.feed_name
-        if hasattr(self, 'file_name'):
-            text += self.file_name
-        if hasattr(self, 'row_num'):
-            text += ":%i" % self.row_num
-        if hasattr(self, 'column_name'):
-            text += " column %s" % self.column_name
-        return text
-
-    def __cmp__(self, y):
-        """Return an int <0/0/>0 when self is more/same/less significant than y.
+        attributes = self.__dict__
+        parts = []
+        if 'feed_name' in attributes:
+            parts.append("In feed '%s': " % self.feed_name)
+        if 'file_name' in attributes:
+            parts.append(self.file_name)
+        if 'row_num' in attributes:
+            parts.append(":%i" % self.row_num)
+        if 'column_name' in attributes:
+            parts.append(" column %s" % self.column_name)
+        return ''.join(parts)
+
+    def get_significance_key(self):
+        """Return a sort key which is smaller for more significant problems.
 
         Subclasses should define this if exceptions should be listed in something
         other than the order they are reported.
 
-        Args:
-          y: object to compare to self
-
         Returns:
-          An int which is negative if self is more significant than y, 0 if they
-          are similar significance and positive if self is less significant than
-          y. Returning a float won't work.
+          A value that orders problems of the same class, most significant first.
 
         Raises:
           TypeError by default, meaning objects of the type can not be compared.
         """
-        raise TypeError("__cmp__ not defined")
+        raise TypeError("get_significance_key not defined")
+
+    def __lt__(self, other):
+        """Return True if self is more significant than other.
+
+        This lets problems that define get_significance_key be sorted directly;
+        sorted(problems, key=ExceptionWithContext.get_significance_key) does the
+        same while computing each key only once.
+        """
+        return self.get_significance_key() < other.get_significance_key()
 
     def get_order_key(self):
         """Return a tuple that can be used to sort problems into a consistent order.
@@ -651,9 +711,9 @@ class stop_too_far_from_parent_station(ExceptionWithContext):
         "%(stop_name)s (ID %(stop_id)s) is too far from its parent station "
         "%(parent_stop_name)s (ID %(parent_stop_id)s) : %(distance).2f meters.")
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in decreasing order because more distance is more significant.
-        return y.distance, self.distance
+        return -self.distance
 
 
 class stops_too_close(ExceptionWithContext):
@@ -662,9 +722,9 @@ class stops_too_close(ExceptionWithContext):
         " (ID %(stop_id_b)s) are %(distance)0.2fm apart and probably represent "
         "the same location.")
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in increasing order because less distance is more significant.
-        return self.distance, y.distance
+        return self.distance
 
 
 class stations_too_close(ExceptionWithContext):
@@ -673,9 +733,9 @@ class stations_too_close(ExceptionWithContext):
         "\"%(stop_name_b)s\" (ID %(stop_id_b)s) are %(distance)0.2fm apart and "
         "probably represent the same location.")
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in increasing order because less distance is more significant.
-        return self.distance, y.distance
+        return self.distance
 
 
 class different_station_too_close(ExceptionWithContext):
@@ -684,9 +744,9 @@ class different_station_too_close(ExceptionWithContext):
         "station \"%(station_stop_name)s\" (ID %(station_stop_id)s) but they are "
         "only %(distance)0.2fm apart.")
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in increasing order because less distance is more significant.
-        return self.distance, y.distance
+        return self.distance
 
 
 class stop_too_far_from_shape_with_dist_traveled(ExceptionWithContext):
@@ -696,9 +756,9 @@ class stop_too_far_from_shape_with_dist_traveled(ExceptionWithContext):
         "(shape_dist_traveled: %(shape_dist_traveled)f) on shape %(shape_id)s. "
         "It should be closer than %(max_distance).0f meters.")
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in decreasing order because more distance is more significant.
-        return y.distance, self.distance
+        return -self.distance
 
 
 class too_many_days_without_service(ExceptionWithContext):
@@ -714,14 +774,16 @@ class minimum_transfer_time_set_with_invalid_transfer_type(ExceptionWithContext)
 
 
 class expiration_date(ExceptionWithContext):
+    _format_keys = ('expiration', 'expiration_origin_file')
+
     def format_problem(self, d=None):
         if not d:
-            d = self.get_dict_to_format()
+            d = self._get_used_dict_to_format()
         expiration_origin_file = d['expiration_origin_file']
         expiration = d['expiration']
         formatted_date = time.strftime("%B %d, %Y",
                                        time.localtime(expiration))
-        if expiration < time.mktime(time.localtime()):
+        if expiration < time.time():
             return "This feed expired on %s (%s)" % (formatted_date,
                                                      expiration_origin_file)
         else:
@@ -730,9 +792,11 @@ class expiration_date(ExceptionWithContext):
 
 
 class future_service(ExceptionWithContext):
+    _format_keys = ('start_date', 'start_date_origin_file')
+
     def format_problem(self, d=None):
         if not d:
-            d = self.get_dict_to_format()
+            d = self._get_used_dict_to_format()
         start_date_origin_file = d['start_date_origin_file']
         formatted_date = time.strftime("%B %d, %Y", time.localtime(d['start_date']))
         return ("The %s in this feed is in the future, on %s. "
@@ -768,21 +832,24 @@ class stop_with_multiple_route_types(ExceptionWithContext):
 
 
 class too_fast_travel(ExceptionWithContext):
+    ERROR_TEXT = "High speed travel detected in trip %(trip_id)s: %(prev_stop)s" \
+                 " to %(next_stop)s. %(dist).0f meters in %(time)d seconds."
+    ERROR_TEXT_WITH_SPEED = ERROR_TEXT + " (%(speed).0f km/h)."
+    _format_keys = ('trip_id', 'prev_stop', 'next_stop', 'dist',
+                    'time', 'speed')
+
     def format_problem(self, d=None):
         if not d:
-            d = self.get_dict_to_format()
+            d = self._get_used_dict_to_format()
         if not d['speed']:
-            return "High speed travel detected in trip %(trip_id)s: %(prev_stop)s" \
-                   " to %(next_stop)s. %(dist).0f meters in %(time)d seconds." % d
+            return self.ERROR_TEXT % d
         else:
-            return "High speed travel detected in trip %(trip_id)s: %(prev_stop)s" \
-                   " to %(next_stop)s. %(dist).0f meters in %(time)d seconds." \
-                   " (%(speed).0f km/h)." % d
+            return self.ERROR_TEXT_WITH_SPEED % d
 
-    def __cmp__(self, y):
+    def get_significance_key(self):
         # Sort in decreasing order because more distance is more significant. We
         # can't sort by speed because not all too_fast_travel objects have a speed.
-        return y.dist, self.dist
+        return -self.dist
 
 
 class duplicate_trip(ExceptionWithContext):
@@ -840,14 +907,98 @@ class ExceptionProblemAccumulator(ProblemAccumulatorInterface):
             self.accumulator._report(e)
 
 
+class CountingProblemAccumulator(ProblemAccumulatorInterface):
+    """A problem accumulator that only counts problems by class and type.
+
+    Problems are never formatted, so this is the cheapest accumulator to use
+    when only a summary of the problems is needed.
+    """
+
+    def __init__(self):
+        # {("ClassName", TYPE_WARNING): count}
+        self.counts = collections.Counter()
+
+    def _report(self, e):
+        self.counts[(e.__class__.__name__, e.get_type())] += 1
+
+    def count(self, problem_type):
+        """Return the number of problems reported of problem_type."""
+        return sum(count for (_, t), count in self.counts.items()
+                   if t == problem_type)
+
+
+class DeduplicatingProblemAccumulator(ProblemAccumulatorInterface):
+    """Forwards problems to another accumulator, dropping repeated warnings and
+       notices.
+
+    A warning or notice is a repeat if an earlier one had the same class and
+    attributes, ignoring the row and headers. Errors are always forwarded.
+    Call report_summary once loading is done to report how many were dropped.
+    """
+
+    _IGNORED_ATTRIBUTES = frozenset(['row', 'headers'])
+
+    def __init__(self, accumulator):
+        self.accumulator = accumulator
+        # {key: number of times the problem was reported}
+        self._seen = {}
+
+    def wants(self, problem_type):
+        return self.accumulator.wants(problem_type)
+
+    def _report(self, e):
+        if e.is_error():
+            self.accumulator._report(e)
+            return
+        ignored = self._IGNORED_ATTRIBUTES
+        key = (e.__class__, tuple(sorted(
+            (k, v) for k, v in e.__dict__.items() if k not in ignored)))
+        try:
+            count = self._seen.get(key)
+        except TypeError:
+            # An attribute value isn't hashable so we can't tell if it repeats.
+            self.accumulator._report(e)
+            return
+        if count is None:
+            self._seen[key] = 1
+            self.accumulator._report(e)
+        else:
+            self._seen[key] = count + 1
+
+    def get_suppressed_count(self):
+        """Return the number of repeated problems that were dropped."""
+        return sum(self._seen.values()) - len(self._seen)
+
+    def report_summary(self):
+        """Report a notice counting the dropped problems of each class."""
+        suppressed = collections.Counter()
+        for (problem_class, _), count in self._seen.items():
+            suppressed[problem_class.__name__] += count - 1
+        for class_name in sorted(suppressed):
+            if suppressed[class_name]:
+                self.accumulator._report(other_problem(
+                    description='Suppressed %d repeats of %s' %
+                                (suppressed[class_name], class_name),
+                    type=TYPE_NOTICE))
+
+
 default_accumulator = ExceptionProblemAccumulator()
 default_problem_reporter = ProblemReporter(default_accumulator)
 
-# Add a default handler to send log messages to console
-console = logging.StreamHandler()
-console.setLevel(logging.WARNING)
 log = logging.getLogger("schedule_builder")
-log.addHandler(console)
+# The console handler for log, created by get_log when first needed.
+console = None
+
+
+def get_log():
+    """Return the schedule_builder logger, adding a handler that sends its
+    warnings to the console the first time this is called."""
+    global console
+    if console is None:
+        console = logging.StreamHandler()
+        console.setLevel(logging.WARNING)
+        log.addHandler(console)
+    return log
 
 
 # Below are the exceptions related to loading and setting up Feed Validator
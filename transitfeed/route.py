@@ -20,6 +20,23 @@ from . import problems as problems_module
 from . import util
 from .gtfsobjectbase import GtfsObjectBase
 
+# Reasons given with the longer route warnings.
+_SHORT_NAME_TOO_LONG_REASON = (
+    'This route_short_name is relatively long, which probably means that it '
+    'contains a place name.  You should only use this field to hold a short '
+    'code that riders use to identify a route.  If this route doesn\'t have '
+    'such a code, it\'s OK to leave this field empty.')
+
+_LOW_COLOR_CONTRAST_REASON = (
+    'The route_text_color and route_color should be set to contrasting colors, '
+    'as they are used as the text and background color (respectively) for '
+    'displaying route names.  When left blank, route_text_color defaults to '
+    '000000 (black) and route_color defaults to FFFFFF (white).  A common '
+    'source of issues here is setting route_color to a dark color, while '
+    'leaving route_text_color set to black.  In this case, route_text_color '
+    'should be set to a lighter color like FFFFFF to ensure a legible contrast '
+    'between the two.')
+
 
 class Route(GtfsObjectBase):
     """Represents a single route."""
@@ -42,8 +59,8 @@ class Route(GtfsObjectBase):
         7: {'name': 'Funicular', 'max_speed': 50},
     }
     # Create a reverse lookup dict of route type names to route types.
-    _ROUTE_TYPE_IDS = set(_ROUTE_TYPES.keys())
-    _ROUTE_TYPE_NAMES = dict((v['name'], k) for k, v in _ROUTE_TYPES.items())
+    _ROUTE_TYPE_IDS = frozenset(_ROUTE_TYPES)
+    _ROUTE_TYPE_NAMES = {v['name']: k for k, v in _ROUTE_TYPES.items()}
     _TABLE_NAME = 'routes'
 
     def __init__(self, short_name=None, long_name=None, route_type=None,
@@ -58,8 +75,9 @@ class Route(GtfsObjectBase):
             if long_name is not None:
                 field_dict['route_long_name'] = long_name
             if route_type is not None:
-                if route_type in self._ROUTE_TYPE_NAMES:
-                    self.route_type = self._ROUTE_TYPE_NAMES[route_type]
+                route_type_id = self._ROUTE_TYPE_NAMES.get(route_type)
+                if route_type_id is not None:
+                    self.route_type = route_type_id
                 else:
                     field_dict['route_type'] = route_type
             if route_id is not None:
@@ -101,23 +119,17 @@ class Route(GtfsObjectBase):
         # Route.add_trip or schedule.add_tripObject.
         self._trips.append(trip)
 
-    def __getattr__(self, name):
-        """Return None or the default value if name is a known attribute.
-
-        This method overrides GtfsObjectBase.__getattr__ to provide backwards
-        compatible access to trips.
-        """
-        if name == 'trips':
-            return self._trips
-        else:
-            return GtfsObjectBase.__getattr__(self, name)
+    @property
+    def trips(self):
+        """The Trip objects of this route, for backwards compatibility."""
+        return self._trips
 
     def get_pattern_id_trip_dict(self):
         """Return a dictionary that maps pattern_id to a list of Trip objects."""
-        d = {}
+        d = util.defaultdict(list)
         for t in self._trips:
-            d.setdefault(t.pattern_id, []).append(t)
-        return d
+            d[t.pattern_id].append(t)
+        return dict(d)
 
     def validate_route_id_is_present(self, problems):
         if util.is_empty(self.route_id):
@@ -139,42 +151,44 @@ class Route(GtfsObjectBase):
         if self.route_short_name and len(self.route_short_name) > 6:
             problems.invalid_value('route_short_name',
                                   self.route_short_name,
-                                  'This route_short_name is relatively long, which '
-                                  'probably means that it contains a place name.  '
-                                  'You should only use this field to hold a short '
-                                  'code that riders use to identify a route.  '
-                                  'If this route doesn\'t have such a code, it\'s '
-                                  'OK to leave this field empty.',
+                                  _SHORT_NAME_TOO_LONG_REASON,
                                   type=problems_module.TYPE_WARNING)
 
     def validate_route_long_name_does_not_contain_short_name(self, problems):
-        if self.route_short_name and self.route_long_name:
-            short_name = self.route_short_name.strip().lower()
-            long_name = self.route_long_name.strip().lower()
-            if (long_name.startswith(short_name + ' ') or
-                    long_name.startswith(short_name + '(') or
-                    long_name.startswith(short_name + '-')):
-                problems.invalid_value('route_long_name',
-                                      self.route_long_name,
-                                      'route_long_name shouldn\'t contain '
-                                      'the route_short_name value, as both '
-                                      'fields are often displayed '
-                                      'side-by-side.',
-                                      type=problems_module.TYPE_WARNING)
+        self._validate_route_long_name_against_short_name(problems,
+                                                          check_equal=False)
 
     def validate_route_short_and_long_names_are_not_equal(self, problems):
-        if self.route_short_name and self.route_long_name:
-            short_name = self.route_short_name.strip().lower()
-            long_name = self.route_long_name.strip().lower()
-            if long_name == short_name:
-                problems.invalid_value('route_long_name',
-                                      self.route_long_name,
-                                      'route_long_name shouldn\'t be the same '
-                                      'the route_short_name value, as both '
-                                      'fields are often displayed '
-                                      'side-by-side.  It\'s OK to omit either the '
-                                      'short or long name (but not both).',
-                                      type=problems_module.TYPE_WARNING)
+        self._validate_route_long_name_against_short_name(problems,
+                                                          check_contains=False)
+
+    def _validate_route_long_name_against_short_name(self, problems,
+                                                     check_contains=True,
+                                                     check_equal=True):
+        """Run the checks comparing the two names, normalizing them only once."""
+        if not (self.route_short_name and self.route_long_name):
+            return
+        short_name = self.route_short_name.strip().lower()
+        long_name = self.route_long_name.strip().lower()
+        n = len(short_name)
+        if (check_contains and len(long_name) > n and
+                long_name.startswith(short_name) and long_name[n] in ' (-'):
+            problems.invalid_value('route_long_name',
+                                  self.route_long_name,
+                                  'route_long_name shouldn\'t contain '
+                                  'the route_short_name value, as both '
+                                  'fields are often displayed '
+                                  'side-by-side.',
+                                  type=problems_module.TYPE_WARNING)
+        if check_equal and long_name == short_name:
+            problems.invalid_value('route_long_name',
+                                  self.route_long_name,
+                                  'route_long_name shouldn\'t be the same '
+                                  'the route_short_name value, as both '
+                                  'fields are often displayed '
+                                  'side-by-side.  It\'s OK to omit either the '
+                                  'short or long name (but not both).',
+                                  type=problems_module.TYPE_WARNING)
 
     def validate_route_description_not_the_same_as_route_name(self, problems):
         if (self.route_desc and
@@ -204,7 +218,7 @@ class Route(GtfsObjectBase):
 
     def validate_route_color(self, problems):
         if self.route_color:
-            if not util.IsValidHexColor(self.route_color):
+            if not util.is_valid_hex_color(self.route_color):
                 problems.invalid_value('route_color', self.route_color,
                                       'route_color should be a valid color description '
                                       'which consists of 6 hexadecimal characters '
@@ -213,7 +227,7 @@ class Route(GtfsObjectBase):
 
     def validate_route_text_color(self, problems):
         if self.route_text_color:
-            if not util.IsValidHexColor(self.route_text_color):
+            if not util.is_valid_hex_color(self.route_text_color):
                 problems.invalid_value('route_text_color', self.route_text_color,
                                       'route_text_color should be a valid color '
                                       'description, which consists of 6 hexadecimal '
@@ -223,30 +237,20 @@ class Route(GtfsObjectBase):
 
     def validate_route_and_text_colors(self, problems):
         if self.route_color:
-            bg_lum = util.ColorLuminance(self.route_color)
+            bg_lum = util.color_luminance(self.route_color)
         else:
-            bg_lum = util.ColorLuminance('ffffff')  # white (default)
+            bg_lum = 255.0  # white (default)
         if self.route_text_color:
-            txt_lum = util.ColorLuminance(self.route_text_color)
+            txt_lum = util.color_luminance(self.route_text_color)
         else:
-            txt_lum = util.ColorLuminance('000000')  # black (default)
+            txt_lum = 0.0  # black (default)
         if abs(txt_lum - bg_lum) < 510 / 7.:
             # http://www.w3.org/TR/2000/WD-AERT-20000426#color-contrast recommends
             # a threshold of 125, but that is for normal text and too harsh for
             # big colored logos like line names, so we keep the original threshold
             # from r541 (but note that weight has shifted between RGB components).
             problems.invalid_value('route_color', self.route_color,
-                                  'The route_text_color and route_color should '
-                                  'be set to contrasting colors, as they are used '
-                                  'as the text and background color (respectively) '
-                                  'for displaying route names.  When left blank, '
-                                  'route_text_color defaults to 000000 (black) and '
-                                  'route_color defaults to FFFFFF (white).  A common '
-                                  'source of issues here is setting route_color to '
-                                  'a dark color, while leaving route_text_color set '
-                                  'to black.  In this case, route_text_color should '
-                                  'be set to a lighter color like FFFFFF to ensure '
-                                  'a legible contrast between the two.',
+                                  _LOW_COLOR_CONTRAST_REASON,
                                   type=problems_module.TYPE_WARNING)
 
     def validate_bikes_allowed(self, problems):
@@ -258,8 +262,9 @@ class Route(GtfsObjectBase):
         self.validate_route_type_is_present(problems)
         self.validate_route_short_and_long_names_are_not_blank(problems)
         self.validate_route_short_name_is_not_too_long(problems)
-        self.validate_route_long_name_does_not_contain_short_name(problems)
-        self.validate_route_short_and_long_names_are_not_equal(problems)
+        # Covers validate_route_long_name_does_not_contain_short_name and
+        # validate_route_short_and_long_names_are_not_equal in one pass.
+        self._validate_route_long_name_against_short_name(problems)
         self.validate_route_description_not_the_same_as_route_name(problems)
         self.validate_route_type_has_valid_value(problems)
         self.validate_route_url(problems)
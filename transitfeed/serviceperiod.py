@@ -17,7 +17,6 @@
 from __future__ import absolute_import
 
 import datetime
-import time
 
 from . import problems as problems_module
 from . import util
@@ -34,6 +33,10 @@ class ServicePeriod(object):
                                 'service_id', 'start_date', 'end_date'
                             ] + _DAYS_OF_WEEK
     _FIELD_NAMES = _REQUIRED_FIELD_NAMES  # no optional fields in this one
+    # Map from day name to its index in day_of_week
+    _DAY_OF_WEEK_INDEX = {day: i for i, day in enumerate(_DAYS_OF_WEEK)}
+    # Map from field name to its position in a calendar.txt row
+    _FIELD_INDEX = {fn: i for i, fn in enumerate(_FIELD_NAMES)}
     _DEPRECATED_FIELD_NAMES = []  # no deprecated fields so far
     _REQUIRED_FIELD_NAMES_CALENDAR_DATES = ['service_id', 'date',
                                             'exception_type']
@@ -47,19 +50,23 @@ class ServicePeriod(object):
     _EXCEPTION_TYPE_ADD = 1
     _EXCEPTION_TYPE_REMOVE = 2
 
+    __slots__ = ('service_id', 'start_date', 'end_date', 'day_of_week',
+                 'original_day_values', 'date_exceptions')
+
     def __init__(self, id=None, field_list=None):
         self.original_day_values = []
         if field_list:
-            self.service_id = field_list[self._FIELD_NAMES.index('service_id')]
+            field_index = self._FIELD_INDEX
+            self.service_id = field_list[field_index['service_id']]
             self.day_of_week = [False] * len(self._DAYS_OF_WEEK)
 
-            for day in self._DAYS_OF_WEEK:
-                value = field_list[self._FIELD_NAMES.index(day)] or ''  # can be None
-                self.original_day_values += [value[0].strip()]
-                self.day_of_week[self._DAYS_OF_WEEK.index(day)] = (value == u'1')
+            for i, day in enumerate(self._DAYS_OF_WEEK):
+                value = field_list[field_index[day]] or ''  # can be None
+                self.original_day_values.append(value[0].strip())
+                self.day_of_week[i] = (value == u'1')
 
-            self.start_date = field_list[self._FIELD_NAMES.index('start_date')]
-            self.end_date = field_list[self._FIELD_NAMES.index('end_date')]
+            self.start_date = field_list[field_index['start_date']]
+            self.end_date = field_list[field_index['end_date']]
         else:
             self.service_id = id
             self.day_of_week = [False] * 7
@@ -90,13 +97,15 @@ class ServicePeriod(object):
         start = self.start_date
         end = self.end_date
 
-        for date, (exception_type, _) in self.date_exceptions.items():
-            if exception_type == self._EXCEPTION_TYPE_REMOVE:
-                continue
-            if not start or (date < start):
-                start = date
-            if not end or (date > end):
-                end = date
+        added = [date for date, (exception_type, _) in self.date_exceptions.items()
+                 if exception_type != self._EXCEPTION_TYPE_REMOVE]
+        if added:
+            first_added = min(added)
+            last_added = max(added)
+            if not start or first_added < start:
+                start = first_added
+            if not end or last_added > end:
+                end = last_added
         if start is None:
             start = end
         elif end is None:
@@ -108,7 +117,10 @@ class ServicePeriod(object):
         """Return the tuple of calendar.txt values or None if this ServicePeriod
         should not be in calendar.txt ."""
         if self.start_date and self.end_date:
-            return [getattr(self, fn) for fn in self._FIELD_NAMES]
+            # Same order as _FIELD_NAMES, without going through __getattr__
+            # for each day of the week.
+            return ([self.service_id, self.start_date, self.end_date] +
+                    [1 if b else 0 for b in self.day_of_week])
 
     def generate_calendar_dates_field_values_tuples(self):
         """Generates tuples of calendar_dates.txt values. Yield zero tuples if
@@ -118,22 +130,27 @@ class ServicePeriod(object):
 
     def get_calendar_dates_field_values_tuples(self):
         """Return a list of date execeptions"""
-        result = []
-        for date_tuple in self.generate_calendar_dates_field_values_tuples():
-            result.append(date_tuple)
-        result.sort()  # helps with __eq__
-        return result
+        return sorted((self.service_id, date, str(exception_type))
+                      for date, (exception_type, _)
+                      in self.date_exceptions.items())
 
     def set_date_has_service(self, date, has_service=True, problems=None):
-        date = ''.join(date)
+        if not isinstance(date, str):
+            # Also accept a sequence of strings such as ('2007', '01', '01')
+            date = ''.join(date)
         if date in self.date_exceptions and problems:
             problems.duplicate_id(('service_id', 'date'),
                                  (self.service_id, date),
                                  type=problems_module.TYPE_WARNING)
-        exception_context_tuple = (has_service and self._EXCEPTION_TYPE_ADD or
-                                   self._EXCEPTION_TYPE_REMOVE, problems != None and
-                                   problems.get_file_context() or None)
-        self.date_exceptions[date] = exception_context_tuple
+        if has_service:
+            exception_type = self._EXCEPTION_TYPE_ADD
+        else:
+            exception_type = self._EXCEPTION_TYPE_REMOVE
+        if problems is not None:
+            context = problems.get_file_context()
+        else:
+            context = None
+        self.date_exceptions[date] = (exception_type, context)
 
     def reset_date_to_normal_service(self, date):
         if date in self.date_exceptions:
@@ -187,9 +204,8 @@ class ServicePeriod(object):
         Returns:
           True iff this service has service exception of specified type at date.
         """
-        if date in self.date_exceptions:
-            return exception_type == self.date_exceptions[date][0]
-        return False
+        exception = self.date_exceptions.get(date)
+        return exception is not None and exception_type == exception[0]
 
     def is_active_on(self, date, date_object=None):
         """Test if this service period is active on a date.
@@ -206,44 +222,47 @@ class ServicePeriod(object):
         Returns:
           True iff this service is active on date.
         """
-        if date in self.date_exceptions:
-            exception_type, _ = self.date_exceptions[date]
-            if exception_type == self._EXCEPTION_TYPE_ADD:
-                return True
-            else:
-                return False
+        exception = self.date_exceptions.get(date)
+        if exception is not None:
+            return exception[0] == self._EXCEPTION_TYPE_ADD
         if self.start_date and self.end_date and self.start_date <= date <= self.end_date:
             if date_object is None:
-                date_object = util.DateStringToDateObject(date)
+                # Slice the "YYYYMMDD" string directly; this is the hot path
+                # of schedule queries.
+                date_object = datetime.date(int(date[0:4]), int(date[4:6]),
+                                            int(date[6:8]))
             return self.day_of_week[date_object.weekday()]
         return False
 
     def active_dates(self):
         """Return dates this service period is active as a list of "YYYYMMDD"."""
-        (earliest, latest) = self.get_date_range()
-        if earliest is None:
-            return []
-        dates = []
-        date_it = util.DateStringToDateObject(earliest)
-        date_end = util.DateStringToDateObject(latest)
-        delta = datetime.timedelta(days=1)
-        while date_it <= date_end:
-            date_it_string = date_it.strftime("%Y%m%d")
-            if self.is_active_on(date_it_string, date_it):
-                dates.append(date_it_string)
-            date_it = date_it + delta
-        return dates
+        dates = set()
+        if self.start_date and self.end_date:
+            # Walk calendar.txt's range once, tracking the weekday as we go,
+            # instead of asking is_active_on about every day.
+            date_it = util.date_string_to_date_object(self.start_date)
+            date_end = util.date_string_to_date_object(self.end_date)
+            delta = datetime.timedelta(days=1)
+            weekday = date_it.weekday()
+            while date_it <= date_end:
+                if self.day_of_week[weekday]:
+                    dates.add("%04d%02d%02d" %
+                              (date_it.year, date_it.month, date_it.day))
+                date_it = date_it + delta
+                weekday = (weekday + 1) % 7
+        for date, (exception_type, _) in self.date_exceptions.items():
+            if exception_type == self._EXCEPTION_TYPE_ADD:
+                dates.add(date)
+            else:
+                dates.discard(date)
+        return sorted(dates)
 
     def __getattr__(self, name):
-        try:
-            # Return 1 if value in day_of_week is True, 0 otherwise
-            return (self.day_of_week[self._DAYS_OF_WEEK.index(name)]
-                    and 1 or 0)
-        except KeyError:
-            pass
-        except ValueError:  # not a day of the week
-            pass
-        raise AttributeError(name)
+        index = self._DAY_OF_WEEK_INDEX.get(name)
+        if index is None:  # not a day of the week
+            raise AttributeError(name)
+        # Return 1 if value in day_of_week is True, 0 otherwise
+        return 1 if self.day_of_week[index] else 0
 
     def __getitem__(self, name):
         return getattr(self, name)
@@ -259,9 +278,17 @@ class ServicePeriod(object):
                 other.get_calendar_field_values_tuple()):
             return False
 
-        if (self.get_calendar_dates_field_values_tuples() !=
-                other.get_calendar_dates_field_values_tuples()):
+        # Same result as comparing get_calendar_dates_field_values_tuples()
+        # without building and sorting both lists. The context stored with
+        # each exception is ignored.
+        if len(self.date_exceptions) != len(other.date_exceptions):
+            return False
+        if self.date_exceptions and self.service_id != other.service_id:
             return False
+        for date, (exception_type, _) in self.date_exceptions.items():
+            other_exception = other.date_exceptions.get(date)
+            if other_exception is None or other_exception[0] != exception_type:
+                return False
 
         return True
 
@@ -307,10 +334,8 @@ class ServicePeriod(object):
                                   type=problems_module.TYPE_WARNING)
 
     def has_date_exception_type_added(self):
-        for exception_type, _ in self.date_exceptions.values():
-            if exception_type == self._EXCEPTION_TYPE_ADD:
-                return True
-        return False
+        return any(v[0] == self._EXCEPTION_TYPE_ADD
+                   for v in self.date_exceptions.values())
 
     def validate_dates(self, problems):
         for date, (exception_type, context) in self.date_exceptions.items():
@@ -329,13 +354,21 @@ class ServicePeriod(object):
             return False
         else:
             try:
-                date_value = time.strptime(date, "%Y%m%d")
-                if not (self._VALID_DATE_RANGE_FROM <= date_value.tm_year <=
+                # Parse "YYYYMMDD" by hand; time.strptime is far slower and
+                # this runs once per row of calendar_dates.txt.
+                # isdigit() alone also accepts non-ASCII digits such as
+                # full-width ones, which int() would happily parse.
+                if len(date) != 8 or not (date.isascii() and date.isdigit()):
+                    raise ValueError(date)
+                year = int(date[0:4])
+                if not (1 <= int(date[4:6]) <= 12 and 1 <= int(date[6:8]) <= 31):
+                    raise ValueError(date)
+                if not (self._VALID_DATE_RANGE_FROM <= year <=
                         self._VALID_DATE_RANGE_TO):
-                    problems.DateOutsideValidRange(field_name, date,
-                                                   self._VALID_DATE_RANGE_FROM,
-                                                   self._VALID_DATE_RANGE_TO,
-                                                   context=context)
+                    problems.date_outside_valid_range(field_name, date,
+                                                      self._VALID_DATE_RANGE_FROM,
+                                                      self._VALID_DATE_RANGE_TO,
+                                                      context=context)
                     return False
                 return True
             except ValueError:
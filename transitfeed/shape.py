@@ -55,15 +55,22 @@ class Shape(GtfsFactoryUser):
 
     def add_shape_point_object_unsorted(self, shapepoint, problems):
         """Insert a point into a correct position by sequence. """
-        if (len(self.sequence) == 0 or
-                shapepoint.shape_pt_sequence >= self.sequence[-1]):
-            index = len(self.sequence)
-        elif shapepoint.shape_pt_sequence <= self.sequence[0]:
+        sequence = self.sequence
+        shape_pt_sequence = shapepoint.shape_pt_sequence
+        if (len(sequence) == 0 or
+                shape_pt_sequence >= sequence[-1]):
+            index = len(sequence)
+        elif shape_pt_sequence <= sequence[0]:
             index = 0
         else:
-            index = bisect.bisect(self.sequence, shapepoint.shape_pt_sequence)
-
-        if shapepoint.shape_pt_sequence in self.sequence:
+            index = bisect.bisect(sequence, shape_pt_sequence)
+
+        # self.sequence is kept sorted, so an equal sequence number can only be
+        # next to the insertion point. This avoids scanning the whole list for
+        # every point added.
+        if ((index > 0 and sequence[index - 1] == shape_pt_sequence) or
+                (index < len(sequence) and
+                 sequence[index] == shape_pt_sequence)):
             problems.invalid_value('shape_pt_sequence', shapepoint.shape_pt_sequence,
                                   'The sequence number %d occurs more than once in '
                                   'shape %s.' %
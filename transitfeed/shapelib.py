@@ -49,6 +49,8 @@ class Point(object):
     A class representing a point on the unit sphere in three dimensions.
     """
 
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -182,8 +184,16 @@ class Point(object):
         """
         Returns the angle in radians between self and other.
         """
-        return math.atan2(self.cross_prod(other).norm2(),
-                          self.dot_prod(other))
+        # Same as atan2(|self x other|, self . other), without building the
+        # intermediate cross product Point; this is the inner loop of
+        # polyline matching.
+        sx, sy, sz = self.x, self.y, self.z
+        ox, oy, oz = other.x, other.y, other.z
+        cx = sy * oz - sz * oy
+        cy = sz * ox - sx * oz
+        cz = sx * oy - sy * ox
+        return math.atan2(math.sqrt(cx * cx + cy * cy + cz * cz),
+                          sx * ox + sy * oy + sz * oz)
 
     def to_lat_lng(self):
         """
@@ -211,6 +221,28 @@ class Point(object):
         assert (self.is_unit_length() and other.is_unit_length())
         return self.angle(other) * EARTH_RADIUS_METERS
 
+    def get_chord_squared(self, other):
+        """
+        Returns the squared straight-line distance between self and other.
+
+        For unit points this grows with the angle between them, so it can be
+        compared against meters_to_chord_squared() of a distance threshold
+        instead of calling get_distance_meters().
+        """
+        dx = self.x - other.x
+        dy = self.y - other.y
+        dz = self.z - other.z
+        return dx * dx + dy * dy + dz * dz
+
+
+def meters_to_chord_squared(meters):
+    """
+    Returns the squared chord length between two unit points that are the
+    given distance apart on the surface of the Earth.
+    """
+    chord = 2 * math.sin(meters / (2 * EARTH_RADIUS_METERS))
+    return chord * chord
+
 
 def simple_c_c_w(a, b, c):
     """
@@ -244,6 +276,28 @@ def get_closest_point(x, a, b):
         return b
 
 
+def _get_closest_point_on_points(p, first, points, start):
+    """
+    Returns (closest_p, closest_i) as Poly.get_closest_point does, for the
+    polyline made of first followed by points[start:].
+    """
+    closest_point = first
+    closest_angle = p.angle(first)
+    closest_i = 0
+
+    a = first
+    for i in range(start, len(points)):
+        b = points[i]
+        cur_closest_point = get_closest_point(p, a, b)
+        if p.angle(cur_closest_point) < closest_angle:
+            closest_point = cur_closest_point.normalize()
+            closest_angle = p.angle(closest_point)
+            closest_i = i - start
+        a = b
+
+    return (closest_point, closest_i)
+
+
 class Poly(object):
     """
     A class representing a polyline.
@@ -252,6 +306,7 @@ class Poly(object):
     def __init__(self, points=[], name=None):
         self._points = list(points)
         self._name = name
+        self._length_meters = None  # computed by length_meters()
 
     def add_point(self, p):
         """
@@ -259,6 +314,7 @@ class Poly(object):
         """
         assert (p.is_unit_length())
         self._points.append(p)
+        self._length_meters = None
 
     def get_name(self):
         return self._name
@@ -286,25 +342,19 @@ class Poly(object):
         the polyline segment that contains closest_p.
         """
         assert (len(self._points) > 0)
-        closest_point = self._points[0]
-        closest_i = 0
-
-        for i in range(0, len(self._points) - 1):
-            (a, b) = (self._points[i], self._points[i + 1])
-            cur_closest_point = get_closest_point(p, a, b)
-            if p.angle(cur_closest_point) < p.angle(closest_point):
-                closest_point = cur_closest_point.normalize()
-                closest_i = i
-
-        return (closest_point, closest_i)
+        return _get_closest_point_on_points(p, self._points[0], self._points, 1)
 
     def length_meters(self):
         """Return length of this polyline in meters."""
         assert (len(self._points) > 0)
-        length = 0
-        for i in range(0, len(self._points) - 1):
-            length += self._points[i].get_distance_meters(self._points[i + 1])
-        return length
+        # PolyGraph.shortest_path asks for the length of the same edges many
+        # times, so remember it until the next add_point.
+        if self._length_meters is None:
+            length = 0
+            for i in range(0, len(self._points) - 1):
+                length += self._points[i].get_distance_meters(self._points[i + 1])
+            self._length_meters = length
+        return self._length_meters
 
     def reversed(self):
         """Return a polyline that is the reverse of this polyline."""
@@ -334,11 +384,21 @@ class Poly(object):
 
         Args: shape, a Poly object.
         """
-        tmp_shape = Poly(shape.get_points())
         max_radius = 0
-        for (i, point) in enumerate(self._points):
-            tmp_shape = tmp_shape.cut_at_closest_point(point)[1]
-            dist = tmp_shape.get_point(0).get_distance_meters(point)
+        if not self._points:
+            return max_radius
+        shape_points = shape.get_points()
+        assert (len(shape_points) > 0)
+        # The remaining shape is first followed by shape_points[start:], which
+        # is what cut_at_closest_point would return, without copying the
+        # points into a new Poly for every point of self.
+        first = shape_points[0]
+        start = 1
+        for point in self._points:
+            (first, i) = _get_closest_point_on_points(point, first,
+                                                      shape_points, start)
+            start += i
+            dist = first.get_distance_meters(point)
             max_radius = max(max_radius, dist)
         return max_radius
 
@@ -352,17 +412,20 @@ class Poly(object):
         merge_point_threshold meters apart, we will only use the first endpoint in
         the merged polyline.
         """
-        name = ";".join((p.get_name(), '')[p.get_name() is None] for p in polys)
+        names = (p.get_name() for p in polys)
+        name = ";".join('' if n is None else n for n in names)
         merged = Poly([], name)
         if polys:
             first_poly = polys[0]
             for p in first_poly.get_points():
                 merged.add_point(p)
             last_point = merged._get_point_safe(-1)
+            threshold_chord_squared = meters_to_chord_squared(merge_point_threshold)
             for poly in polys[1:]:
                 first_point = poly._get_point_safe(0)
                 if (last_point and first_point and
-                        last_point.get_distance_meters(first_point) <= merge_point_threshold):
+                        last_point.get_chord_squared(first_point) <=
+                        threshold_chord_squared):
                     points = poly.get_points()[1:]
                 else:
                     points = poly.get_points()
@@ -418,9 +481,12 @@ class PolyCollection(object):
         within max_radius of the given start and end points.
         """
         matches = []
-        for shape in self._name_to_shape.itervalues():
-            if start_point.get_distance_meters(shape.get_point(0)) < max_radius and \
-                    end_point.get_distance_meters(shape.get_point(-1)) < max_radius:
+        max_chord_squared = meters_to_chord_squared(max_radius)
+        for shape in self._name_to_shape.values():
+            if (start_point.get_chord_squared(shape.get_point(0)) <
+                    max_chord_squared and
+                    end_point.get_chord_squared(shape.get_point(-1)) <
+                    max_chord_squared):
                 matches.append(shape)
         return matches
 
@@ -473,13 +539,17 @@ class PolyGraph(PolyCollection):
         assert start in self._nodes
         assert goal in self._nodes
         closed_set = set()  # Set of nodes already evaluated.
-        open_heap = [(0, start)]  # Nodes to visit, heapified by f(x).
-        open_set = set([start])  # Same as open_heap, but a set instead of a heap.
+        # Nodes to visit, heapified by f(x). A node is pushed again whenever a
+        # shorter path to it is found; the older entries are skipped once the
+        # node is closed. The counter keeps ties from comparing Points.
+        open_heap = [(0, 0, start)]
+        push_count = 0
         g_scores = {start: 0}  # Distance from start along optimal path
         came_from = {}  # Map to reconstruct optimal path once we're done.
-        while open_set:
-            (f_x, x) = heapq.heappop(open_heap)
-            open_set.remove(x)
+        while open_heap:
+            (f_x, _, x) = heapq.heappop(open_heap)
+            if x in closed_set:
+                continue
             if x == goal:
                 return self._reconstruct_path(came_from, goal)
             closed_set.add(x)
@@ -492,18 +562,13 @@ class PolyGraph(PolyCollection):
                 if y in closed_set:
                     continue
                 tentative_g_score = g_scores[x] + edge.length_meters()
-                tentative_is_better = False
-                if y not in open_set:
-                    h_y = y.get_distance_meters(goal)
-                    f_y = tentative_g_score + h_y
-                    open_set.add(y)
-                    heapq.heappush(open_heap, (f_y, y))
-                    tentative_is_better = True
-                elif tentative_g_score < g_scores[y]:
-                    tentative_is_better = True
-                if tentative_is_better:
+                if y not in g_scores or tentative_g_score < g_scores[y]:
                     came_from[y] = (x, edge)
                     g_scores[y] = tentative_g_score
+                    h_y = y.get_distance_meters(goal)
+                    push_count += 1
+                    heapq.heappush(open_heap,
+                                   (tentative_g_score + h_y, push_count, y))
         return None
 
     def _reconstruct_path(self, came_from, current_node):
@@ -543,9 +608,10 @@ class PolyGraph(PolyCollection):
         nearby_points = []
         paths_found = []  # A heap sorted by inverse path length.
 
+        max_chord_squared = meters_to_chord_squared(max_radius)
         for i, point in enumerate(points):
-            nearby = [p for p in self._nodes.iterkeys()
-                      if p.get_distance_meters(point) < max_radius]
+            nearby = [p for p in self._nodes
+                      if p.get_chord_squared(point) < max_chord_squared]
             if verbosity >= 2:
                 print("Nearby points for point %d %s: %s"
                       % (i + 1,
@@ -25,6 +25,7 @@ import optparse
 import random
 import re
 import socket
+import string
 import sys
 try:
     from urllib import request as urllib2
@@ -310,7 +311,8 @@ def is_valid_hex_color(color):
     Checks the validity of a hex color value:
       - the color string must consist of 6 hexadecimal digits
     """
-    return not re.match('^[0-9a-fA-F]{6}$', color) == None
+    # Stripping every hex digit leaves nothing only if there was nothing else.
+    return len(color) == 6 and not color.strip(string.hexdigits)
 
 
 def is_valid_language_code(lang):
@@ -458,9 +460,10 @@ def color_luminance(color):
 
     Returns:
       A floating-point number between 0.0 (black) and 255.0 (white). """
-    r = int(color[0:2], 16)
-    g = int(color[2:4], 16)
-    b = int(color[4:6], 16)
+    rgb = int(color[0:6], 16)
+    r = rgb >> 16
+    g = (rgb >> 8) & 0xff
+    b = rgb & 0xff
     return (299 * r + 587 * g + 114 * b) / 1000.0
 
 